@@ -3,13 +3,15 @@ import random
 from datetime import datetime
 
 from config.settings import *
-from utils.text_processing import make_response_casual, detect_crisis_keywords
 from utils.voice_handler import VoiceHandler
-from utils.qa_chain import initialize_qa_chain
+from utils.qa_chain import get_chain_warmup
+from utils.index_store import region_for_locale
+from utils.metrics import metrics
+from utils.session_manager import track_current_session
 from ui.styles import apply_custom_css
 from ui.sidebar import render_sidebar
 from ui.chat_display import render_chat_history
-from ui.input_handlers import render_input_section, render_action_buttons
+from ui.input_handlers import render_input_section, render_action_buttons, handle_user_input_processing
 
 # Streamlit Configuration
 st.set_page_config(
@@ -28,8 +30,13 @@ def initialize_session_state():
         welcome_msg = random.choice(WELCOME_MESSAGES)
         st.session_state.chat_history.append(("bot", welcome_msg))
 
-    if "qa_chain" not in st.session_state:
-        st.session_state.qa_chain = initialize_qa_chain()
+    # Loading the index happens in the background so the UI paints immediately
+    get_chain_warmup()
+
+    # Knowledge base region, defaulting to the browser's locale
+    if "region" not in st.session_state:
+        browser_context = getattr(st, "context", None)
+        st.session_state.region = region_for_locale(getattr(browser_context, "locale", None))
 
     if "generating_response" not in st.session_state:
         st.session_state.generating_response = False
@@ -40,35 +47,15 @@ def initialize_session_state():
     if "pending_audio" not in st.session_state:
         st.session_state.pending_audio = None
 
+    if "pending_audio_html" not in st.session_state:
+        st.session_state.pending_audio_html = None
+
     if "voice_handler" not in st.session_state:
         st.session_state.voice_handler = VoiceHandler()
 
 def process_user_input(user_input):
     """Process user input and generate bot response"""
-    try:
-        # Check for crisis
-        is_crisis = detect_crisis_keywords(user_input)
-        
-        # Get response
-        response = st.session_state.qa_chain.invoke({"question": user_input})
-        answer = make_response_casual(response["answer"])
-        
-        # Add bot response to history
-        if is_crisis:
-            crisis_response = f"I can see you're going through something really difficult right now. You're not alone. 💙\n\n{CRISIS_RESOURCES}\n\n{answer}"
-            st.session_state.chat_history.append(("bot", crisis_response))
-        else:
-            st.session_state.chat_history.append(("bot", answer))
-        
-        # Mark that we need to generate audio for the new bot message
-        if st.session_state.voice_handler.is_available():
-            message_id = len(st.session_state.chat_history) - 1
-            st.session_state.pending_audio = message_id
-        
-        return True
-    except Exception as e:
-        st.session_state.chat_history.append(("bot", f"I apologize, but I encountered an error: {e}. Please try again."))
-        return False
+    return handle_user_input_processing(user_input, st.session_state.voice_handler)
 
 def handle_pending_audio():
     """Handle pending audio generation"""
@@ -77,15 +64,42 @@ def handle_pending_audio():
         if message_index < len(st.session_state.chat_history):
             role, message = st.session_state.chat_history[message_index]
             if role == "bot" and message_index not in st.session_state.audio_generated:
-                audio_html = st.session_state.voice_handler.text_to_speech_with_progress(message)
+                # Use audio synthesized during the turn when there is some
+                audio_html = st.session_state.pending_audio_html
+                if not audio_html:
+                    audio_html = st.session_state.voice_handler.text_to_speech_with_progress(message)
                 if audio_html:
                     st.markdown(audio_html, unsafe_allow_html=True)
                 st.session_state.audio_generated.add(message_index)
         
         # Clear pending audio
         st.session_state.pending_audio = None
+        st.session_state.pending_audio_html = None
+
+def render_readiness_probe():
+    """
+    Show ?probe=ready (warm-up status) or ?probe=metrics in the browser instead of the chat UI.
+
+    These are for people; Streamlit returns 200 for any page, so load
+    balancers should poll the HTTP endpoint in utils/health.py instead.
+    """
+    probe = st.query_params.get("probe")
+    if probe == "ready":
+        st.json(get_chain_warmup().readiness())
+    elif probe == "metrics":
+        st.json(metrics.snapshot())
+    else:
+        return False
+    return True
 
 def main():
+    # Readiness and metrics probes
+    if render_readiness_probe():
+        return
+
+    # Memory accounting; restores this session first if it was moved to disk
+    track_current_session()
+
     # Initialize everything
     initialize_session_state()
     
@@ -94,7 +108,7 @@ def main():
     st.markdown("<p class='subtitle'>A safe space for mental wellness guidance</p>", unsafe_allow_html=True)
     
     # Sidebar
-    render_sidebar(st.session_state.voice_handler.is_available())
+    render_sidebar(st.session_state.voice_handler.is_available(), get_chain_warmup().is_ready())
     
     # Chat display
     render_chat_history(st.session_state.chat_history)
@@ -142,6 +156,8 @@ def main():
             ```bash
             pip install SpeechRecognition gtts pyaudio
             ```
+            Optional: `pip install webrtcvad faster-whisper` for quicker
+            end-of-speech detection and offline recognition.
             Then restart the app.
             """)
 
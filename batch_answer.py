@@ -0,0 +1,170 @@
+"""
+Answer a file of questions offline, for clinical review
+
+Questions are read from JSONL ({"id": ..., "question": ...}) or CSV (id and
+question columns; id is optional in both). Each batch of questions is
+embedded in one call and searched in one FAISS call, then answered through
+the same turn pipeline as the chat UI with bounded concurrency. Results are
+appended to the output JSONL as they finish, so an interrupted run resumes
+where it stopped when started again with the same output file.
+
+Only full LLM answers ("status": "answered") count as done. Errors and
+degraded fallbacks (cached, extractive or canned text, e.g. while the LLM
+circuit is open) are written with "status": "error" or "degraded", make the
+exit code non-zero and are retried on the next run; use the last
+"answered" row for each id.
+
+Usage:
+    python batch_answer.py questions.jsonl answers.jsonl [--concurrency 4] [--route au] [--region au]
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from config.settings import QA_CHAIN_CONFIG, INDEX_ROUTES, CRISIS_SCREEN_CONFIG, REGIONS, DEFAULT_REGION
+from utils.audit_log import audit_log
+from utils.crisis_screen import crisis_screener
+from utils.deadline import TurnDeadline, FULL, REDUCED_K
+from utils.qa_chain import build_qa_chain
+from utils.turn_pipeline import run_turn_async
+
+# Degradation levels that mean the LLM really answered the question
+ANSWERED_LEVELS = (FULL, REDUCED_K)
+
+def read_questions(path):
+    """Load questions as a list of {"id", "question"} dicts"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+    else:
+        with open(path, encoding="utf-8") as jsonl_file:
+            rows = [json.loads(line) for line in jsonl_file if line.strip()]
+
+    questions = []
+    for number, row in enumerate(rows, start=1):
+        question = (row.get("question") or "").strip()
+        if question:
+            questions.append({"id": str(row.get("id") or number), "question": question})
+    return questions
+
+def completed_ids(output_path):
+    """Ids already answered in the output file (the checkpoint); failed or degraded rows are redone"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run; that item is redone
+                continue
+            if record.get("status") == "answered" and "id" in record:
+                done.add(record["id"])
+    return done
+
+def describe_source(doc):
+    metadata = doc.metadata
+    return {
+        "source": metadata.get("source"),
+        "page": metadata.get("page"),
+        "pages": metadata.get("pages"),
+        "chunk_id": metadata.get("chunk_id"),
+        "excerpt": doc.page_content[:200]
+    }
+
+async def answer_batch(chain, items, output_file, semaphore, deadline_seconds, region=None):
+    """Embed and retrieve a batch in bulk, then answer each item concurrently"""
+    bulk_start = time.perf_counter()
+    embeddings = chain.embed_queries(item["question"] for item in items)
+    documents = chain.retrieve_batch(embeddings)
+    bulk_seconds = (time.perf_counter() - bulk_start) / len(items)
+
+    async def answer_one(item, embedding, docs):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await run_turn_async(
+                    item["question"],
+                    lambda timeout: chain,
+                    deadline=TurnDeadline(deadline_seconds),
+                    query_embedding=embedding,
+                    documents=docs,
+                    session_id=f"batch:{item['id']}",
+                    region=region
+                )
+                answered = result["degradation"] in ANSWERED_LEVELS
+                record = {
+                    "id": item["id"],
+                    "question": item["question"],
+                    "status": "answered" if answered else "degraded",
+                    "answer": result["reply"],
+                    "raw_answer": result["answer"],
+                    "is_crisis": result["is_crisis"],
+                    "degradation": result["degradation"],
+                    "sources": [describe_source(doc) for doc in result["source_documents"]],
+                    "timings": dict(result["timings"], bulk_retrieval_share=round(bulk_seconds, 4))
+                }
+            except Exception as e:
+                record = {"id": item["id"], "question": item["question"], "status": "error", "error": str(e)}
+            record["seconds"] = round(time.perf_counter() - start + bulk_seconds, 4)
+
+        output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output_file.flush()
+        return record["status"] == "answered"
+
+    return await asyncio.gather(*(
+        answer_one(item, embedding, docs)
+        for item, embedding, docs in zip(items, embeddings, documents)
+    ))
+
+async def run(args):
+    questions = read_questions(args.input)
+    done = completed_ids(args.output)
+    pending = [item for item in questions if item["id"] not in done]
+    print(f"{len(questions)} questions, {len(done)} already answered, {len(pending)} to go", file=sys.stderr)
+    if not pending:
+        return 0
+
+    chain = build_qa_chain(args.index)
+    if CRISIS_SCREEN_CONFIG["enabled"]:
+        crisis_screener.prepare(chain.embedding)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures = 0
+
+    with open(args.output, "a", encoding="utf-8") as output_file:
+        for start in range(0, len(pending), args.batch_size):
+            batch = pending[start:start + args.batch_size]
+            outcomes = await answer_batch(chain, batch, output_file, semaphore, args.deadline, args.region)
+            failures += outcomes.count(False)
+            print(f"Answered {start + len(batch)}/{len(pending)}", file=sys.stderr)
+
+    audit_log.flush()
+
+    return 1 if failures else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL/CSV file of questions")
+    parser.add_argument("input", help="Questions (.jsonl or .csv)")
+    parser.add_argument("output", help="Answers JSONL; also the resume checkpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="Questions answered at once")
+    parser.add_argument("--batch-size", type=int, default=32, help="Questions embedded and searched per call")
+    parser.add_argument("--deadline", type=float, default=120.0, help="Seconds allowed per question")
+    parser.add_argument("--index", default=QA_CHAIN_CONFIG["vector_store_path"], help="Index directory")
+    parser.add_argument("--route", choices=sorted(INDEX_ROUTES), help="Use the index of an INDEX_ROUTES entry")
+    parser.add_argument("--region", choices=sorted(REGIONS), help="Region whose crisis resources are quoted (default: the route's region)")
+    args = parser.parse_args()
+
+    if args.route:
+        args.index = INDEX_ROUTES[args.route]
+    if args.region is None:
+        args.region = args.route if args.route in REGIONS else DEFAULT_REGION
+
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Build the chunk-level FAISS index used by the Mental Health Support app
+
+Each build becomes a new version under <index>/versions and is made current
+once complete; running apps switch to it without a restart.
+
+Usage:
+    python build_index.py [--pdf data/mental.pdf] [--output mental_health_index]
+    python build_index.py --pdf data/au.pdf --route au
+    python build_index.py --list
+    python build_index.py --rollback [--version v0002]
+"""
+
+import argparse
+import sys
+from config.settings import INGESTION_CONFIG, QA_CHAIN_CONFIG, INDEX_ROUTES
+from utils.index_versions import list_versions, current_version, read_manifest, rollback
+
+def print_versions(index_path):
+    current = current_version(index_path)
+    versions = list_versions(index_path)
+    if not versions:
+        print(f"{index_path} has no versions")
+        return
+    for version in versions:
+        manifest = read_manifest(index_path, version)
+        marker = "*" if version == current else " "
+        print(f"{marker} {version}  {manifest.get('chunk_count')} chunks from {manifest.get('source')}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the knowledge base index")
+    parser.add_argument("--pdf", default=INGESTION_CONFIG["pdf_path"], help="Source PDF")
+    parser.add_argument("--output", default=QA_CHAIN_CONFIG["vector_store_path"], help="Index directory")
+    parser.add_argument("--route", choices=sorted(INDEX_ROUTES), help="Write to the directory of an INDEX_ROUTES entry")
+    parser.add_argument("--list", action="store_true", help="List the index's versions and exit")
+    parser.add_argument("--rollback", action="store_true", help="Serve the previous version instead of building")
+    parser.add_argument("--version", help="With --rollback, the version to serve")
+    args = parser.parse_args()
+
+    if args.route:
+        args.output = INDEX_ROUTES[args.route]
+
+    if args.list:
+        print_versions(args.output)
+        return
+
+    if args.rollback:
+        try:
+            version = rollback(args.output, args.version)
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"{args.output} now serves {version}")
+        return
+
+    # Imported here so --list and --rollback work without langchain installed
+    from utils.ingestion import build_index
+
+    manifest = build_index(args.pdf, args.output)
+    print(f"Indexed {manifest['chunk_count']} chunks from {args.pdf} into {args.output} as {manifest['version']}")
+    if manifest["dedup"]:
+        dedup = manifest["dedup"]
+        print(f"Near-duplicates removed: {dedup['chunks_before']} -> {dedup['chunks_after']} chunks "
+              f"({dedup['shrink_ratio']:.1%} smaller)")
+
+if __name__ == "__main__":
+    main()
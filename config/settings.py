@@ -3,6 +3,7 @@ Configuration settings and constants for the Mental Health Support app
 """
 
 import os
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,13 +12,10 @@ load_dotenv()
 # API Keys
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Voice feature availability check
-try:
-    import speech_recognition as sr
-    from gtts import gTTS
-    VOICE_FEATURES_AVAILABLE = True
-except ImportError:
-    VOICE_FEATURES_AVAILABLE = False
+# Voice feature availability check (find_spec avoids importing the packages)
+VOICE_FEATURES_AVAILABLE = (
+    find_spec("speech_recognition") is not None and find_spec("gtts") is not None
+)
 
 # Crisis resources
 CRISIS_RESOURCES = """
@@ -30,6 +28,24 @@ CRISIS_RESOURCES = """
 You matter. Help is available right now. 💙
 """
 
+# Australian crisis resources quoted in chat replies
+AUSTRALIAN_CRISIS_RESOURCES_TEXT = """
+🆘 **Immediate Help Available 24/7:**
+
+• **13 11 14** - Lifeline Crisis Support
+• **Text 0477 13 11 14** - Lifeline Text Service
+• **1300 22 4636** - Beyond Blue
+• **000** - Emergency Services
+
+You matter. Help is available right now. 💙
+"""
+
+# Crisis resources in chat replies by region (see REGIONS)
+REGIONAL_CRISIS_RESOURCES = {
+    "au": AUSTRALIAN_CRISIS_RESOURCES_TEXT,
+    "us": CRISIS_RESOURCES
+}
+
 # Australian Crisis Resources (for sidebar)
 AUSTRALIAN_CRISIS_RESOURCES = """
 <div class="sidebar-section">
@@ -68,11 +84,177 @@ CRISIS_KEYWORDS = [
     "hurt myself", "don't want to live"
 ]
 
+# Semantic crisis screening: the retrieval query embedding is compared with
+# these exemplars, so paraphrases the keywords miss still get crisis resources
+CRISIS_EXEMPLARS = [
+    "I want to kill myself",
+    "I don't see a point anymore",
+    "I don't want to be here anymore",
+    "Everyone would be better off without me",
+    "I can't go on like this",
+    "I've been thinking about ending my life",
+    "I want to disappear forever",
+    "There's no way out for me",
+    "I've been cutting myself",
+    "I have a plan to end things",
+    "I wish I could go to sleep and never wake up",
+    "Nothing matters and I want it to stop"
+]
+
+CRISIS_SCREEN_CONFIG = {
+    "enabled": True,
+    "threshold": 0.86,              # Cosine similarity to the closest exemplar
+    "cache_path": ".crisis_exemplars.npz",  # Exemplar embeddings, reused across restarts
+    "retry_initial_seconds": 5,     # Failed exemplar embedding is retried after this...
+    "retry_max_seconds": 300        # ...doubling up to this
+}
+
 # QA Chain settings
+# search_kwargs["k"] is the number of candidate chunks fetched from FAISS;
+# the context packer then keeps as many as fit in the token budget.
 QA_CHAIN_CONFIG = {
     "temperature": 0.8,
-    "search_kwargs": {"k": 2},
-    "vector_store_path": "mental_health_index"
+    "search_kwargs": {"k": 6},
+    "vector_store_path": "mental_health_index",
+    "history_turns": 4              # Recent exchanges included in the prompt
+}
+
+# Knowledge base routing
+# Route keys are a region or "default"; a session uses its region's index
+# if that directory exists, otherwise the default.
+INDEX_ROUTES = {
+    "default": QA_CHAIN_CONFIG["vector_store_path"],
+    "au": "mental_health_index_au",
+    "us": "mental_health_index_us"
+}
+
+REGIONS = {
+    "au": "Australia",
+    "us": "United States"
+}
+
+DEFAULT_REGION = "au"
+
+# Indexes are memory-mapped read-only so worker processes share their pages
+INDEX_MMAP = True
+
+# Versioned indexes: each build goes to <index>/versions/vNNNN and the
+# <index>/CURRENT file names the version being served
+INDEX_VERSION_CONFIG = {
+    "versions_dir": "versions",
+    "pointer_file": "CURRENT",
+    "manifest_file": "manifest.json",
+    "watch": True,                  # Pick up new versions without a restart
+    "poll_seconds": 30,
+    "keep_versions": 5              # Older versions are deleted after a build
+}
+
+# Background warm-up settings
+WARMUP_CONFIG = {
+    "enabled": True,
+    "touch_index": True,         # Read index files so their pages are cached
+    "warm_embeddings": True,     # Embed a short probe to open the API connection
+    "warm_llm": False,           # Send a 1-token completion (costs a request)
+    "wait_timeout": 60           # Default seconds to wait for the chain to be built
+}
+
+# Plain HTTP health endpoint for load balancers and orchestrators, served on
+# its own port next to Streamlit: GET /ready answers 200 once warm-up has
+# finished and 503 before that (body: the readiness JSON), GET /metrics
+# returns the metrics snapshot. Every app process on a host needs its own
+# port (HEALTH_PORT, or serve.py --health-port); a taken port is an error.
+HEALTH_CONFIG = {
+    "enabled": True,
+    "host": "0.0.0.0",
+    "port": int(os.getenv("HEALTH_PORT", "8502"))
+}
+
+# Per-turn latency budget and degradation steps
+DEADLINE_CONFIG = {
+    "turn_deadline": 8.0,           # Seconds from question to reply
+    "reduced_k_below": 6.0,         # Shrink retrieval when less time than this remains
+    "reduced_k": 2,
+    "min_generation_seconds": 1.5,  # Don't start the LLM with less time than this
+    "tts_min_remaining": 2.0        # Skip speech when less time than this remains
+}
+
+# Hedged requests and circuit breakers for LLM and TTS calls
+RESILIENCE_CONFIG = {
+    "hedged_backends": ["llm", "tts_openai"],
+    "hedge_quantile": 0.95,         # Hedge after the backend's p95 latency...
+    "hedge_min_samples": 20,        # ...once this many calls have been timed
+    "hedge_default_delay": 2.0,     # Delay used before then
+    "hedge_min_delay": 0.5,
+    "hedge_max_delay": 5.0,
+    "breaker_failure_threshold": 5, # Consecutive failures that open a circuit
+    "breaker_reset_seconds": 30     # Time before a trial call is let through
+}
+
+# Answer cache (fallback when generation misses the deadline)
+ANSWER_CACHE_CONFIG = {
+    "max_entries": 500,
+    "ttl_seconds": 6 * 60 * 60
+}
+
+# Canned replies when neither the LLM, the cache nor retrieval can answer in time
+FALLBACK_MESSAGES = [
+    "I'm here with you. Could you tell me a little more about what's going on?",
+    "Thanks for sharing that with me. How are you feeling right now?",
+    "That sounds like a lot to carry. I'm listening - what feels hardest at the moment?"
+]
+
+# Per-session memory accounting and idle-session reaping
+SESSION_CONFIG = {
+    "idle_spill_seconds": 15 * 60,      # Idle sessions are moved to disk after this
+    "spill_ttl_seconds": 24 * 60 * 60,  # Spilled sessions are deleted after this
+    "spill_dir": ".session_spill",
+    "max_session_bytes": 5 * 1024 * 1024,
+    "max_total_bytes": 200 * 1024 * 1024,
+    "max_chat_history": 200,            # Oldest messages are trimmed beyond this
+    "min_chat_history": 20,             # Never trimmed below this many messages
+    "reap_interval_seconds": 60,
+    "use_tracemalloc": False            # Also report Python heap via tracemalloc
+}
+
+# Context packing settings
+CONTEXT_CONFIG = {
+    "token_budget": 600,            # Max tokens of retrieved context per prompt
+    "min_relevance_score": 0.35,    # Drop chunks scoring below this (0-1)
+    "duplicate_threshold": 0.8      # Word-overlap ratio treated as a near-duplicate
+}
+
+# Ingestion settings
+INGESTION_CONFIG = {
+    "pdf_path": "data/mental.pdf",
+    "chunk_size": 1000,
+    "chunk_overlap": 100,
+    "tokenizer_encoding": "cl100k_base"
+}
+
+# Audit log of turns, crisis detections, cache hits and errors for safety
+# review. Events are queued in memory and written by a background thread to
+# gzip-compressed JSONL files; when the queue is full events are dropped
+# (and counted) rather than slowing a turn down.
+AUDIT_LOG_CONFIG = {
+    "enabled": True,
+    "log_dir": "audit_logs",
+    "include_text": True,           # Store questions and replies, not just metadata
+    "queue_size": 10000,
+    "batch_size": 200,              # Events per compressed write
+    "flush_interval": 1.0,          # Seconds before a partial batch is written
+    "max_file_bytes": 50 * 1024 * 1024,
+    "keep_files": 30,
+    "max_retries": 3,               # Write attempts per batch before it is dropped
+    "retry_backoff": 0.5            # Seconds, doubled on each failed attempt
+}
+
+# Near-duplicate chunk removal at ingestion (MinHash over word shingles)
+DEDUP_CONFIG = {
+    "enabled": True,
+    "threshold": 0.85,              # Estimated Jaccard similarity treated as a duplicate
+    "shingle_size": 5,              # Words per shingle
+    "num_perm": 128,
+    "bands": 32                     # LSH bands; num_perm / bands rows each
 }
 
 # Voice settings
@@ -80,8 +262,16 @@ VOICE_CONFIG = {
     "tts_model": "tts-1",
     "voice": "nova",
     "speed": 0.98,
-    "listen_timeout": 5,
-    "phrase_time_limit": 5
+    "listen_timeout": 5,              # Seconds to wait for speech to start
+    "phrase_time_limit": 15,          # Hard cap on one utterance
+    "recognizer": "google",           # "google" or "faster_whisper" (offline)
+    "whisper_model": "base.en",
+    "calibration_duration": 0.5,      # Ambient noise sample on first use
+    "calibration_ttl": 300,           # Seconds before recalibrating
+    "vad_aggressiveness": 2,          # webrtcvad mode 0-3, when installed
+    "vad_frame_ms": 30,
+    "end_silence_ms": 600,            # Silence that ends an utterance
+    "browser_audio": True             # Offer in-browser recording when supported
 }
 
 # Text processing settings
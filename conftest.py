@@ -0,0 +1,2 @@
+# Puts the repository root on sys.path so a plain `pytest` run can import
+# config/ and utils/ the same way `python -m pytest` does.
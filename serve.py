@@ -0,0 +1,42 @@
+"""
+Run the app with warm-up and the health endpoint started before the first visitor
+
+`streamlit run app.py` only executes app code once a browser session
+connects, so nothing warms up (and /ready is not served) until then. This
+launcher starts both in the Streamlit process first, then hands over to
+Streamlit's own CLI, so an orchestrator's readiness probe can watch
+http://<host>:<health port>/ready from process start.
+
+Each process needs its own health port: pass --health-port (or set
+HEALTH_PORT) per worker. The launcher exits with an error if the port is taken.
+
+Usage:
+    python serve.py [--health-port 8502] [streamlit run options, e.g. --server.port 8501]
+"""
+
+import argparse
+import os
+import sys
+from config.settings import HEALTH_CONFIG
+from utils.qa_chain import get_chain_warmup
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the app with warm-up started first", add_help=False)
+    parser.add_argument("--health-port", type=int, default=HEALTH_CONFIG["port"],
+                        help="Port of this process's /ready and /metrics endpoint")
+    args, streamlit_args = parser.parse_known_args()
+    HEALTH_CONFIG["port"] = args.health_port
+
+    try:
+        get_chain_warmup()
+    except OSError as e:
+        sys.exit(f"serve.py: {e}")
+
+    from streamlit.web import cli as streamlit_cli
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    sys.argv = ["streamlit", "run", app_path] + streamlit_args
+    sys.exit(streamlit_cli.main())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import gzip
+import threading
+
+from config.settings import AUDIT_LOG_CONFIG
+from utils.audit_log import AuditLog
+
+class BlockingAuditLog(AuditLog):
+    """Audit log whose writer holds each batch until released"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.release = threading.Event()
+        self.batch_taken = threading.Event()
+
+    def _write(self, batch):
+        self.batch_taken.set()
+        self.release.wait()
+        super()._write(batch)
+
+def test_flush_waits_for_the_batch_being_written(tmp_path):
+    config = dict(AUDIT_LOG_CONFIG, log_dir=str(tmp_path), flush_interval=0.01)
+    audit_log = BlockingAuditLog(config)
+
+    for i in range(3):
+        assert audit_log.log("turn", number=i)
+    assert audit_log.batch_taken.wait(5)
+
+    # The queue is empty now, but the batch has not been written yet
+    assert audit_log.flush(timeout=0.2) is False
+
+    audit_log.release.set()
+    assert audit_log.flush(timeout=5) is True
+
+    lines = [line for path in tmp_path.iterdir() for line in gzip.open(path, "rt")]
+    assert len(lines) == 3
+
+def test_log_drops_instead_of_blocking_when_full(tmp_path):
+    config = dict(AUDIT_LOG_CONFIG, log_dir=str(tmp_path), queue_size=1, flush_interval=0.01)
+    audit_log = BlockingAuditLog(config)
+
+    results = [audit_log.log("turn", number=i) for i in range(20)]
+
+    assert results.count(True) < 20
+    audit_log.release.set()
+    assert audit_log.flush(timeout=5) is True
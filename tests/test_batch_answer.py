@@ -0,0 +1,31 @@
+import json
+
+from batch_answer import completed_ids
+
+def test_completed_ids_only_counts_answered_rows(tmp_path):
+    output = tmp_path / "answers.jsonl"
+    rows = [
+        {"id": "1", "status": "answered", "answer": "..."},
+        {"id": "2", "status": "degraded", "degradation": "canned"},
+        {"id": "3", "status": "error", "error": "boom"},
+        {"id": "4", "error": "row from an older run"}
+    ]
+    output.write_text(
+        "".join(json.dumps(row) + "\n" for row in rows) + '{"id": "5", "sta',
+        encoding="utf-8"
+    )
+
+    assert completed_ids(str(output)) == {"1"}
+
+def test_retried_item_counts_once_answered(tmp_path):
+    output = tmp_path / "answers.jsonl"
+    output.write_text(
+        json.dumps({"id": "7", "status": "degraded"}) + "\n"
+        + json.dumps({"id": "7", "status": "answered"}) + "\n",
+        encoding="utf-8"
+    )
+
+    assert completed_ids(str(output)) == {"7"}
+
+def test_missing_output_file_means_nothing_done(tmp_path):
+    assert completed_ids(str(tmp_path / "missing.jsonl")) == set()
@@ -0,0 +1,64 @@
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.dedup import MinHasher, estimated_jaccard, find_duplicate_groups
+
+def _sets_with_jaccard(jaccard, size=400):
+    """Two shingle sets of the given size whose true Jaccard similarity is about jaccard"""
+    common = int(round(2 * size * jaccard / (1 + jaccard)))
+    shared = [f"shared {i}" for i in range(common)]
+    first = set(shared + [f"first {i}" for i in range(size - common)])
+    second = set(shared + [f"second {i}" for i in range(size - common)])
+    return first, second
+
+@pytest.mark.parametrize("jaccard", [0.05, 0.15, 0.3, 0.5, 0.7, 0.85, 0.95])
+def test_estimate_tracks_true_jaccard(jaccard):
+    hasher = MinHasher(256)
+    first, second = _sets_with_jaccard(jaccard)
+    true = len(first & second) / len(first | second)
+
+    estimate = estimated_jaccard(hasher.signature(first), hasher.signature(second))
+
+    # Standard error at 256 permutations is at most ~0.03
+    assert abs(estimate - true) < 0.12
+
+def test_estimate_is_not_all_or_nothing():
+    hasher = MinHasher(128)
+    first, second = _sets_with_jaccard(0.5)
+    estimate = estimated_jaccard(hasher.signature(first), hasher.signature(second))
+    assert 0.0 < estimate < 1.0
+
+def _random_text(rng, vocabulary, length=150):
+    return " ".join(rng.choice(vocabulary) for _ in range(length))
+
+def test_low_similarity_chunks_are_not_merged():
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    texts = []
+    for _ in range(100):
+        # Pairs sharing a 60-word passage: true shingle Jaccard around 0.17
+        passage = _random_text(rng, vocabulary, 60)
+        texts.append(f"{_random_text(rng, vocabulary, 140)} {passage}")
+        texts.append(f"{passage} {_random_text(rng, vocabulary, 140)}")
+
+    groups = find_duplicate_groups(texts, threshold=0.85)
+
+    assert len(groups) == len(texts)
+
+def test_near_duplicates_are_merged_with_first_occurrence():
+    rng = random.Random(1)
+    vocabulary = [f"w{i}" for i in range(3000)]
+    blurb = _random_text(rng, vocabulary, 200)
+    texts = [
+        blurb,
+        _random_text(rng, vocabulary),
+        blurb + " page 7",
+        _random_text(rng, vocabulary)
+    ]
+
+    groups = find_duplicate_groups(texts, threshold=0.85)
+
+    assert [0, 2] in groups
+    assert len(groups) == 3
@@ -0,0 +1,55 @@
+import pytest
+
+from utils import resilience
+from utils.resilience import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience, "time", fake)
+    return fake
+
+def test_breaker_opens_half_opens_expires_trial_and_closes(clock):
+    breaker = CircuitBreaker("test-backend", failure_threshold=2, reset_seconds=30)
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    # After the reset period one trial call is let through
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    # The trial never reports back: it expires and the circuit re-opens
+    clock.now += 30
+    assert not breaker.allow()
+    assert breaker.state == OPEN
+
+    # The next trial succeeds and closes the circuit
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+def test_failed_trial_reopens_circuit(clock):
+    breaker = CircuitBreaker("test-backend-2", failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
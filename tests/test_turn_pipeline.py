@@ -0,0 +1,51 @@
+import pytest
+
+from config.settings import AUDIT_LOG_CONFIG, AUSTRALIAN_CRISIS_RESOURCES_TEXT, CRISIS_RESOURCES
+from utils.deadline import CANNED, TurnDeadline
+from utils.turn_pipeline import run_turn
+
+@pytest.fixture(autouse=True)
+def no_audit_log(monkeypatch):
+    monkeypatch.setitem(AUDIT_LOG_CONFIG, "enabled", False)
+
+def _no_chain(timeout):
+    return None
+
+def test_missing_chain_still_gives_crisis_resources():
+    result = run_turn("I want to kill myself", _no_chain, deadline=TurnDeadline(5), region="us")
+
+    assert result["is_crisis"] is True
+    assert CRISIS_RESOURCES in result["reply"]
+    assert result["degradation"] == CANNED
+    assert result["source_documents"] == []
+
+def test_missing_chain_degrades_to_canned_reply():
+    result = run_turn("How can I sleep better?", _no_chain, deadline=TurnDeadline(5))
+
+    assert result["is_crisis"] is False
+    assert CRISIS_RESOURCES not in result["reply"]
+    assert AUSTRALIAN_CRISIS_RESOURCES_TEXT not in result["reply"]
+    assert result["degradation"] == CANNED
+    assert result["answer"]
+
+@pytest.mark.parametrize("region, resources", [
+    ("au", AUSTRALIAN_CRISIS_RESOURCES_TEXT),
+    ("us", CRISIS_RESOURCES),
+    (None, AUSTRALIAN_CRISIS_RESOURCES_TEXT)
+])
+def test_crisis_reply_quotes_the_regions_resources(region, resources):
+    result = run_turn("I want to kill myself", _no_chain, deadline=TurnDeadline(5), region=region)
+
+    assert resources in result["reply"]
+
+def test_chain_provider_gets_the_time_left_in_the_turn():
+    timeouts = []
+
+    def provider(timeout):
+        timeouts.append(timeout)
+        return None
+
+    run_turn("hello", provider, deadline=TurnDeadline(5))
+
+    assert len(timeouts) == 1
+    assert 0 < timeouts[0] <= 5
@@ -5,7 +5,12 @@ Input handling and action button components
 import streamlit as st
 import random
 from config.settings import WELCOME_MESSAGES, AFFIRMATIONS
-from utils.text_processing import detect_crisis_keywords, make_response_casual
+from utils.audit_log import audit_log
+from utils.index_store import select_index_path
+from utils.qa_chain import get_chain_warmup
+from utils.session_manager import current_session
+from utils.turn_pipeline import run_turn
+from utils.voice_handler import audio_html
 
 def render_input_section(voice_handler):
     """Render the input section with text input and microphone button"""
@@ -25,36 +30,43 @@ def render_input_section(voice_handler):
         else:
             st.markdown('<div style="padding: 12px; text-align: center; color: #999;">🎤</div>', unsafe_allow_html=True)
     
+    # In-browser recording, for when the server has no microphone of its own
+    browser_text = render_browser_audio_input(voice_handler)
+    if browser_text:
+        return browser_text
+    
     return user_input
 
-def process_voice_input(voice_handler, qa_chain):
+def render_browser_audio_input(voice_handler):
+    """Transcribe a clip recorded in the browser, once per new recording"""
+    if not (voice_handler.is_available() and voice_handler.config["browser_audio"]
+            and hasattr(st, "audio_input")):
+        return None
+
+    recording = st.audio_input("Or record a voice message", key="browser_audio")
+    if recording is None:
+        return None
+
+    # The widget keeps its value across reruns, so skip clips already handled
+    wav_bytes = recording.getvalue()
+    clip_id = hash(wav_bytes)
+    if st.session_state.get("last_browser_audio") == clip_id:
+        return None
+    st.session_state.last_browser_audio = clip_id
+
+    speech_text = voice_handler.transcribe_audio_bytes(wav_bytes)
+    if speech_text:
+        st.success(f"You said: '{speech_text}'")
+    return speech_text
+
+def process_voice_input(voice_handler):
     """Process voice input and add to chat"""
     speech_text = voice_handler.listen_for_speech()
     if speech_text:
         st.success(f"You said: '{speech_text}'")
-        try:
-            is_crisis = detect_crisis_keywords(speech_text)
-            response = qa_chain.invoke({"question": speech_text})
-            answer = make_response_casual(response["answer"])
-            
-            # Add to chat history
-            st.session_state.chat_history.append(("user", speech_text))
-            
-            if is_crisis:
-                from config.settings import CRISIS_RESOURCES
-                crisis_response = f"I can see you're going through something difficult. You're not alone. 💙\n\n{CRISIS_RESOURCES}\n\n{answer}"
-                st.session_state.chat_history.append(("bot", crisis_response))
-            else:
-                st.session_state.chat_history.append(("bot", answer))
-            
-            # Mark that we need to generate audio for the new bot message
-            if voice_handler.is_available():
-                message_id = len(st.session_state.chat_history) - 1
-                st.session_state.pending_audio = message_id
-            
-            st.rerun()
-        except Exception as e:
-            st.error(f"Something went wrong: {e}")
+        st.session_state.chat_history.append(("user", speech_text))
+        handle_user_input_processing(speech_text, voice_handler)
+        st.rerun()
 
 def render_action_buttons(voice_available):
     """Render action buttons for new conversation and daily affirmation"""
@@ -66,6 +78,7 @@ def render_action_buttons(voice_available):
             st.session_state.generating_response = False
             st.session_state.audio_generated = set()  # Reset audio tracking
             st.session_state.pending_audio = None
+            st.session_state.pending_audio_html = None
             welcome_msg = random.choice(WELCOME_MESSAGES)
             st.session_state.chat_history.append(("bot", welcome_msg))
             # Mark that we need to generate audio for the welcome message
@@ -83,26 +96,36 @@ def render_action_buttons(voice_available):
                 st.session_state.pending_audio = message_id
             st.rerun()
 
-def handle_user_input_processing(user_input, qa_chain):
-    """Handle processing of user input and generate bot response"""
-    from config.settings import CRISIS_RESOURCES
-    
+def handle_user_input_processing(user_input, voice_handler=None):
+    """Run one turn through the shared pipeline and add the bot reply to the chat"""
+    session_id, _ = current_session()
     try:
-        # Check for crisis
-        is_crisis = detect_crisis_keywords(user_input)
+        # Route to the session's knowledge base; the turn waits for the chain
+        # only as long as its deadline allows
+        index_path = select_index_path(st.session_state.region)
+        warmup = get_chain_warmup()
         
-        # Get response
-        response = qa_chain.invoke({"question": user_input})
-        answer = make_response_casual(response["answer"])
+        # History before this question (it is already the last entry)
+        result = run_turn(
+            user_input,
+            lambda timeout: warmup.wait_for_chain(index_path, timeout),
+            st.session_state.chat_history[:-1],
+            voice_handler,
+            session_id=session_id,
+            region=st.session_state.region
+        )
+        st.session_state.chat_history.append(("bot", result["reply"]))
         
-        # Add bot response to history
-        if is_crisis:
-            crisis_response = f"I can see you're going through something really difficult right now. You're not alone. 💙\n\n{CRISIS_RESOURCES}\n\n{answer}"
-            st.session_state.chat_history.append(("bot", crisis_response))
-        else:
-            st.session_state.chat_history.append(("bot", answer))
+        # Audio made during the turn is played on the next run; otherwise
+        # it is synthesized then, unless the turn ran out of time for it
+        if voice_handler is not None and voice_handler.is_available() and not result["skip_tts"]:
+            message_id = len(st.session_state.chat_history) - 1
+            st.session_state.pending_audio = message_id
+            if result["audio"]:
+                st.session_state.pending_audio_html = audio_html(result["audio"])
         
         return True
     except Exception as e:
+        audit_log.log("error", session_id=session_id, stage="turn", error=repr(e))
         st.session_state.chat_history.append(("bot", f"I apologize, but I encountered an error: {e}. Please try again."))
-        return False
\ No newline at end of file
+        return False
@@ -3,14 +3,17 @@ Sidebar components for the Mental Health Support app
 """
 
 import streamlit as st
-from config.settings import AUSTRALIAN_CRISIS_RESOURCES
+from config.settings import AUSTRALIAN_CRISIS_RESOURCES, REGIONS, DEFAULT_REGION
+from utils.text_processing import crisis_resources_for_region
 
-def render_sidebar(voice_available=False):
+def render_sidebar(voice_available=False, knowledge_base_ready=True):
     """Render the sidebar with crisis resources and app info"""
     with st.sidebar:
+        # Knowledge base region
+        render_region_selector()
+        
         # Crisis Resources
-        st.markdown("### 🆘 Crisis Resources")
-        st.markdown(AUSTRALIAN_CRISIS_RESOURCES, unsafe_allow_html=True)
+        render_crisis_resources()
         
         # Voice Features Status
         if voice_available:
@@ -23,6 +26,10 @@ def render_sidebar(voice_available=False):
             </div>
             """, unsafe_allow_html=True)
         
+        # Knowledge base warm-up status
+        if not knowledge_base_ready:
+            st.caption("⏳ Getting ready... your first reply may take a moment.")
+        
         # Supportive Reminders
         st.markdown("### 💜 Remember")
         st.markdown("""
@@ -34,10 +41,23 @@ def render_sidebar(voice_available=False):
         </div>
         """, unsafe_allow_html=True)
 
+def render_region_selector():
+    """Render the region picker that routes questions to a regional knowledge base"""
+    st.selectbox(
+        "🌏 Region",
+        options=list(REGIONS),
+        format_func=lambda region: REGIONS[region],
+        key="region"
+    )
+
 def render_crisis_resources():
-    """Render just the crisis resources section"""
+    """Render the crisis resources section for the session's region"""
     st.markdown("### 🆘 Crisis Resources")
-    st.markdown(AUSTRALIAN_CRISIS_RESOURCES, unsafe_allow_html=True)
+    region = st.session_state.get("region", DEFAULT_REGION)
+    if region == "au":
+        st.markdown(AUSTRALIAN_CRISIS_RESOURCES, unsafe_allow_html=True)
+    else:
+        st.markdown(crisis_resources_for_region(region))
 
 def render_voice_status(voice_available):
     """Render voice feature status"""
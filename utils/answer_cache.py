@@ -0,0 +1,66 @@
+"""
+Process-wide cache of recent answers, used as a fast fallback
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from config.settings import ANSWER_CACHE_CONFIG
+
+def normalize_question(question):
+    """Lowercase and strip punctuation so trivially different phrasings share a key"""
+    return " ".join(re.findall(r"\w+", question.lower()))
+
+def history_fingerprint(history_text):
+    """
+    Short digest of the chat history an answer was generated with.
+
+    Answers depend on (and can quote) the asker's history, so it is part of
+    the cache scope: an answer is only reused for a turn whose prompt had
+    exactly the same history, never served into another conversation.
+    """
+    if not history_text:
+        return ""
+    return hashlib.sha256(history_text.encode("utf-8")).hexdigest()[:16]
+
+class AnswerCache:
+    """Small LRU cache of answers with a time-to-live"""
+
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        self.max_entries = max_entries or ANSWER_CACHE_CONFIG["max_entries"]
+        self.ttl_seconds = ttl_seconds or ANSWER_CACHE_CONFIG["ttl_seconds"]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, question, scope):
+        return (scope, normalize_question(question))
+
+    def get(self, question, scope=None):
+        key = self._key(question, scope)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            answer, stored_at = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+
+    def put(self, question, answer, scope=None):
+        key = self._key(question, scope)
+        with self._lock:
+            self._entries[key] = (answer, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+# Process-wide cache
+answer_cache = AnswerCache()
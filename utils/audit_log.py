@@ -0,0 +1,138 @@
+"""
+Non-blocking audit log for safety review
+
+log() only puts the event on a bounded in-memory queue. A background
+writer drains it in batches, each written as one gzip member appended to
+a rotating audit-*.jsonl.gz file (readable with zcat or gzip.open). A full
+queue drops the event and counts it; a failing disk is retried with backoff
+on the writer thread, never on the caller's.
+"""
+
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from config.settings import AUDIT_LOG_CONFIG
+from utils.metrics import metrics
+
+class AuditLog:
+    """Bounded queue of audit events drained by a background batch writer"""
+
+    def __init__(self, config=None):
+        self.config = config or AUDIT_LOG_CONFIG
+        self._queue = queue.Queue(maxsize=self.config["queue_size"])
+        self._writer = None
+        self._start_lock = threading.Lock()
+        self._file_path = None
+        self._file_bytes = 0
+        self._file_day = None
+
+    def log(self, event, **fields):
+        """Queue an event; returns False if it was dropped. Never blocks."""
+        if not self.config["enabled"]:
+            return False
+        self.start()
+        record = {"ts": round(time.time(), 3), "event": event}
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment("audit_dropped", event=event)
+            return False
+        return True
+
+    def start(self):
+        """Start the writer thread (once)"""
+        if self._writer is None:
+            with self._start_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.flush)
+        return self
+
+    def flush(self, timeout=5.0):
+        """
+        Wait (up to timeout) for queued events to be written, e.g. at shutdown.
+
+        Events count as unfinished from put until the writer has written or
+        dropped their batch (task_done), so this also waits for a batch the
+        writer has already taken off the queue. Returns True if all were handled.
+        """
+        end = time.time() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _next_batch(self):
+        """Block for the first event, then collect until the batch is full or the interval passes"""
+        batch = [self._queue.get()]
+        end = time.time() + self.config["flush_interval"]
+        while len(batch) < self.config["batch_size"]:
+            remaining = end - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            metrics.set_gauge("audit_queue_depth", self._queue.qsize())
+            backoff = self.config["retry_backoff"]
+            for attempt in range(self.config["max_retries"]):
+                try:
+                    self._write(batch)
+                    metrics.increment("audit_written", len(batch))
+                    break
+                except Exception:
+                    metrics.increment("audit_write_errors")
+                    time.sleep(backoff)
+                    backoff *= 2
+            else:
+                metrics.increment("audit_dropped", len(batch), event="write_failed")
+            for _ in batch:
+                self._queue.task_done()
+
+    def _current_file(self, pending_bytes):
+        """Path to append to, rotating on a new day or when the file is full"""
+        day = time.strftime("%Y%m%d")
+        if (self._file_path is None or day != self._file_day
+                or self._file_bytes + pending_bytes > self.config["max_file_bytes"]):
+            os.makedirs(self.config["log_dir"], exist_ok=True)
+            # The pid keeps files from several worker processes apart
+            name = f"audit-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl.gz"
+            self._file_path = os.path.join(self.config["log_dir"], name)
+            self._file_bytes = 0
+            self._file_day = day
+            self._prune()
+        return self._file_path
+
+    def _write(self, batch):
+        lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch)
+        data = gzip.compress(lines.encode("utf-8"))
+        path = self._current_file(len(data))
+        with open(path, "ab") as log_file:
+            log_file.write(data)
+        self._file_bytes += len(data)
+
+    def _prune(self):
+        files = sorted(glob.glob(os.path.join(self.config["log_dir"], "audit-*.jsonl.gz")), key=os.path.getmtime)
+        for path in files[:-self.config["keep_files"]]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+audit_log = AuditLog()
@@ -0,0 +1,63 @@
+"""
+Token-budgeted context packing for retrieved chunks
+"""
+
+import re
+from config.settings import CONTEXT_CONFIG
+from utils.text_processing import count_tokens
+
+def _word_set(text):
+    """Lowercased set of words used for near-duplicate comparison"""
+    return set(re.findall(r"\w+", text.lower()))
+
+def is_near_duplicate(words, other_words, threshold):
+    """Check whether two word sets overlap enough to count as duplicates"""
+    if not words or not other_words:
+        return False
+    overlap = len(words & other_words) / min(len(words), len(other_words))
+    return overlap >= threshold
+
+def chunk_token_count(doc):
+    """Token count stored at ingestion time, computed on the fly for older indexes"""
+    token_count = doc.metadata.get("token_count")
+    if token_count is None:
+        token_count = count_tokens(doc.page_content)
+    return token_count
+
+def pack_context(scored_docs, token_budget=None, min_score=None, duplicate_threshold=None):
+    """
+    Select retrieved chunks that fit the token budget.
+
+    scored_docs is a list of (document, relevance score) pairs, best first.
+    Low-scoring chunks and near-duplicates of already selected chunks are
+    dropped; chunks that would overflow the budget are skipped so a smaller
+    one further down the list can still fit.
+    """
+    if token_budget is None:
+        token_budget = CONTEXT_CONFIG["token_budget"]
+    if min_score is None:
+        min_score = CONTEXT_CONFIG["min_relevance_score"]
+    if duplicate_threshold is None:
+        duplicate_threshold = CONTEXT_CONFIG["duplicate_threshold"]
+
+    selected = []
+    selected_words = []
+    tokens_used = 0
+
+    for doc, score in sorted(scored_docs, key=lambda pair: pair[1], reverse=True):
+        if score < min_score:
+            break
+
+        tokens = chunk_token_count(doc)
+        if tokens_used + tokens > token_budget:
+            continue
+
+        words = _word_set(doc.page_content)
+        if any(is_near_duplicate(words, seen, duplicate_threshold) for seen in selected_words):
+            continue
+
+        selected.append(doc)
+        selected_words.append(words)
+        tokens_used += tokens
+
+    return selected
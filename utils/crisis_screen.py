@@ -0,0 +1,125 @@
+"""
+Semantic crisis screening on the query embedding already used for retrieval
+
+Exemplar phrases are embedded once (at warm-up, then cached on disk) into a
+normalized matrix. Screening a turn is a single matrix-vector product against
+the query embedding, so it adds no network call. If embedding the exemplars
+fails, turns keep triggering background retries with backoff until it works;
+the crisis_screen_ready gauge shows whether the semantic screen is active.
+"""
+
+import hashlib
+import threading
+import time
+from config.settings import CRISIS_EXEMPLARS, CRISIS_SCREEN_CONFIG
+from utils.metrics import metrics
+
+def _normalize_rows(matrix):
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+class CrisisScreener:
+    """Flags queries whose embedding is close to any crisis exemplar"""
+
+    def __init__(self, exemplars=None, config=None):
+        self.exemplars = list(exemplars or CRISIS_EXEMPLARS)
+        self.config = config or CRISIS_SCREEN_CONFIG
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._embedding = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._retrying = False
+        metrics.set_gauge("crisis_screen_ready", 0)
+
+    def _cache_key(self, embedding):
+        model = getattr(embedding, "model", type(embedding).__name__)
+        text = "\n".join([str(model)] + self.exemplars)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _load_cached(self, key):
+        import numpy as np
+
+        try:
+            with np.load(self.config["cache_path"]) as cached:
+                if str(cached["key"]) == key:
+                    return cached["matrix"]
+        except (OSError, KeyError, ValueError):
+            pass
+        return None
+
+    def prepare(self, embedding):
+        """Embed the exemplars with the retrieval embedding model (once per process)"""
+        import numpy as np
+
+        self._embedding = embedding
+        with self._lock:
+            if self._matrix is not None:
+                return self
+            key = self._cache_key(embedding)
+            matrix = self._load_cached(key)
+            if matrix is None:
+                try:
+                    vectors = embedding.embed_documents(self.exemplars)
+                except Exception:
+                    self._failures += 1
+                    delay = self.config["retry_initial_seconds"] * 2 ** (self._failures - 1)
+                    self._retry_at = time.time() + min(delay, self.config["retry_max_seconds"])
+                    metrics.increment("crisis_screen_prepare_errors")
+                    raise
+                matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+                try:
+                    np.savez(self.config["cache_path"], key=key, matrix=matrix)
+                except OSError:
+                    pass
+            self._matrix = matrix
+            self._failures = 0
+        metrics.set_gauge("crisis_screen_ready", 1)
+        return self
+
+    def _retry_prepare(self):
+        """Retry a failed prepare() on a background thread once its backoff has passed"""
+        with self._lock:
+            if (self._embedding is None or self._matrix is not None
+                    or self._retrying or time.time() < self._retry_at):
+                return
+            self._retrying = True
+
+        def retry():
+            try:
+                self.prepare(self._embedding)
+            except Exception:
+                pass
+            finally:
+                self._retrying = False
+
+        threading.Thread(target=retry, name="crisis-screen-prepare", daemon=True).start()
+
+    def is_ready(self):
+        return self._matrix is not None
+
+    def score(self, query_embedding):
+        """Highest cosine similarity to an exemplar, or None before prepare()"""
+        import numpy as np
+
+        matrix = self._matrix
+        if matrix is None or query_embedding is None:
+            return None
+        query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+        return float((matrix @ query).max())
+
+    def is_crisis(self, query_embedding):
+        """True when the query is semantically close to a crisis exemplar"""
+        if not self.config["enabled"]:
+            return False
+        score = self.score(query_embedding)
+        if score is None:
+            metrics.increment("crisis_screen_skipped")
+            self._retry_prepare()
+            return False
+        metrics.observe("crisis_screen_score", score)
+        return score >= self.config["threshold"]
+
+crisis_screener = CrisisScreener()
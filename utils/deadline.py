@@ -0,0 +1,80 @@
+"""
+Turn deadlines and the degradation steps taken as they approach
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import DEADLINE_CONFIG, QA_CHAIN_CONFIG, FALLBACK_MESSAGES
+from utils.answer_cache import answer_cache
+from utils.metrics import metrics
+from utils.text_processing import extract_key_sentences
+
+# Degradation levels, from best to most degraded
+FULL = "full"
+REDUCED_K = "reduced_k"
+PARTIAL = "partial"
+CACHE = "cache"
+EXTRACTIVE = "extractive"
+CANNED = "canned"
+
+# Slow calls keep running here after their turn has moved on
+turn_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="turn-worker")
+
+class TurnDeadline:
+    """Latency budget for one chat turn"""
+
+    def __init__(self, budget_seconds=None):
+        self.budget = budget_seconds or DEADLINE_CONFIG["turn_deadline"]
+        self.started = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def remaining(self):
+        return max(0.0, self.budget - self.elapsed())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+def choose_k(deadline, config=None):
+    """Retrieval depth and level: search_kwargs["k"], or reduced_k when time is short"""
+    config = config or DEADLINE_CONFIG
+    if deadline.remaining() < config["reduced_k_below"]:
+        return config["reduced_k"], REDUCED_K
+    return QA_CHAIN_CONFIG["search_kwargs"]["k"], FULL
+
+def can_start_generation(deadline, config=None):
+    config = config or DEADLINE_CONFIG
+    return deadline.remaining() >= config["min_generation_seconds"]
+
+def should_skip_tts(deadline, config=None):
+    config = config or DEADLINE_CONFIG
+    return deadline.remaining() < config["tts_min_remaining"]
+
+def cache_late_answer(future, question, scope):
+    """Cache an LLM answer that arrives after its turn gave up, for a retry with the same history"""
+    def callback(done):
+        if not done.cancelled() and done.exception() is None and done.result():
+            answer_cache.put(question, done.result(), scope)
+    future.add_done_callback(callback)
+
+def fallback_answer(question, docs, scope=None):
+    """Cheapest available answer: cached, extractive from the top chunk, or canned"""
+    cached = answer_cache.get(question, scope)
+    if cached:
+        return cached, CACHE
+
+    if docs:
+        extract = extract_key_sentences(docs[0].page_content)
+        if extract:
+            return f"Here's something that might help: {extract}", EXTRACTIVE
+
+    return random.choice(FALLBACK_MESSAGES), CANNED
+
+def record_turn_outcome(level, skip_tts, deadline):
+    """Record the degradation decision and turn latency in metrics"""
+    metrics.increment("turn_degradation", level=level)
+    if skip_tts:
+        metrics.increment("turn_tts_skipped")
+    metrics.observe("turn_seconds", deadline.elapsed())
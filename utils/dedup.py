@@ -0,0 +1,121 @@
+"""
+Near-duplicate chunk elimination with MinHash and LSH banding
+
+PDF headers, footers, disclaimers and hotline blurbs repeat across pages.
+Chunks whose word shingles overlap above a Jaccard threshold are collapsed
+into the first occurrence, which keeps the pages of every copy it replaced.
+"""
+
+import re
+import zlib
+from config.settings import DEDUP_CONFIG
+
+# Signature value for an empty shingle set; real hash values are below 2**32
+_EMPTY = 1 << 32
+
+def shingles(text, size):
+    """Set of word n-grams of a text (the whole text if it is shorter than size)"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+class MinHasher:
+    """
+    MinHash signatures with num_perm universal hash functions.
+
+    Each function is the multiply-add-shift scheme for 32-bit keys,
+    ((a * h + b) mod 2**64) >> 32 with random 64-bit a and b. This is
+    strongly universal, and the mod 2**64 is simply uint64 wraparound.
+    """
+
+    def __init__(self, num_perm, seed=1):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self._np = np
+        self._a = rng.integers(0, 1 << 64, size=num_perm, dtype=np.uint64, endpoint=False)
+        self._b = rng.integers(0, 1 << 64, size=num_perm, dtype=np.uint64, endpoint=False)
+
+    def signature(self, shingle_set):
+        np = self._np
+        if not shingle_set:
+            return np.full(len(self._a), _EMPTY, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set),
+            dtype=np.uint64, count=len(shingle_set)
+        )
+        # One (shingles x permutations) matrix op, min over shingles; uint64
+        # arithmetic wraps mod 2**64 and the shift keeps the high 32 bits
+        return ((np.outer(hashes, self._a) + self._b) >> np.uint64(32)).min(axis=0)
+
+def estimated_jaccard(signature, other_signature):
+    return float((signature == other_signature).mean())
+
+def find_duplicate_groups(texts, threshold=None, shingle_size=None, num_perm=None, bands=None):
+    """
+    Group indexes of near-duplicate texts.
+
+    Returns a list of groups (lists of indexes, first occurrence first);
+    texts without a near-duplicate form a group of one.
+    """
+    config = DEDUP_CONFIG
+    threshold = threshold if threshold is not None else config["threshold"]
+    shingle_size = shingle_size or config["shingle_size"]
+    num_perm = num_perm or config["num_perm"]
+    bands = bands or config["bands"]
+    rows = num_perm // bands
+
+    hasher = MinHasher(num_perm)
+    signatures = [hasher.signature(shingles(text, shingle_size)) for text in texts]
+
+    # Union-find over candidate pairs that share at least one LSH band
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            key = signature[band * rows:(band + 1) * rows].tobytes()
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root, other_root = find(first), find(other)
+                if root != other_root and estimated_jaccard(signatures[first], signatures[other]) >= threshold:
+                    parent[max(root, other_root)] = min(root, other_root)
+
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=lambda group: group[0])
+
+def dedup_chunks(chunks, threshold=None):
+    """
+    Collapse near-duplicate chunk documents.
+
+    Each kept chunk gets "pages" (every source page of its copies) and
+    "duplicate_count" metadata. Returns (kept chunks, stats) where stats
+    include the shrink ratio (fraction of chunks removed).
+    """
+    groups = find_duplicate_groups([chunk.page_content for chunk in chunks], threshold)
+
+    kept = []
+    for group in groups:
+        chunk = chunks[group[0]]
+        pages = {chunks[i].metadata.get("page") for i in group}
+        chunk.metadata["pages"] = sorted(page for page in pages if page is not None)
+        chunk.metadata["duplicate_count"] = len(group) - 1
+        kept.append(chunk)
+
+    stats = {
+        "chunks_before": len(chunks),
+        "chunks_after": len(kept),
+        "shrink_ratio": round(1 - len(kept) / len(chunks), 4) if chunks else 0.0
+    }
+    return kept, stats
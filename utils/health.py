@@ -0,0 +1,70 @@
+"""
+HTTP readiness and metrics endpoint on a side port
+
+Streamlit answers every page URL with the same HTML shell and a 200, so a
+load balancer cannot read warm-up state from it. This small server runs on
+a daemon thread in the app process and answers with real status codes:
+
+    GET /ready    200 when the QA chain is warm, 503 otherwise (readiness JSON)
+    GET /metrics  200 with the metrics snapshot
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.settings import HEALTH_CONFIG
+from utils.metrics import metrics
+
+_server = None
+_server_lock = threading.Lock()
+
+def _make_handler(warmup):
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0].rstrip("/")
+            if path == "/ready":
+                payload = warmup.readiness()
+                status = 200 if payload["ready"] else 503
+            elif path == "/metrics":
+                payload, status = metrics.snapshot(), 200
+            else:
+                payload, status = {"error": "not found"}, 404
+
+            body = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Probes arrive every few seconds; keep them out of the app log
+            pass
+
+    return HealthHandler
+
+def start_health_server(warmup, config=None):
+    """
+    Serve /ready and /metrics for this process (once); returns the server,
+    or None when disabled. Raises OSError if the port is already taken.
+    """
+    global _server
+    config = config or HEALTH_CONFIG
+    if not config["enabled"]:
+        return None
+
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((config["host"], config["port"]), _make_handler(warmup))
+            except OSError as e:
+                # Another process (often a second app worker) holds the port; its
+                # /ready would answer for that process, so don't carry on silently
+                metrics.increment("health_server_errors")
+                raise OSError(
+                    f"Health endpoint port {config['port']} is not available ({e}); "
+                    "give each app process its own HEALTH_PORT or serve.py --health-port"
+                ) from e
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="health-server", daemon=True).start()
+        return _server
@@ -0,0 +1,183 @@
+"""
+Knowledge base routing and shared, memory-mapped FAISS indexes
+"""
+
+import os
+import pickle
+import threading
+import time
+import weakref
+from config.settings import INDEX_ROUTES, REGIONS, DEFAULT_REGION, INDEX_MMAP, INDEX_VERSION_CONFIG
+from utils.index_versions import resolve_index_dir, version_number
+from utils.metrics import metrics
+
+def region_for_locale(locale):
+    """Map a locale such as "en-AU" or "en_US" to a configured region"""
+    if locale:
+        country = locale.replace("_", "-").split("-")[-1].lower()
+        if country in REGIONS:
+            return country
+    return DEFAULT_REGION
+
+def select_index_path(region=None, routes=None):
+    """Pick the region's index if it exists on disk, otherwise the default"""
+    routes = routes or INDEX_ROUTES
+    path = routes.get(region) if region else None
+    if path and os.path.isdir(path):
+        return path
+    return routes["default"]
+
+def available_index_paths(routes=None):
+    """Distinct index directories that exist on disk, default first"""
+    routes = routes or INDEX_ROUTES
+    paths = [routes["default"]]
+    for path in routes.values():
+        if path not in paths and os.path.isdir(path):
+            paths.append(path)
+    return paths
+
+def load_faiss_index(index_path, embedding, mmap=INDEX_MMAP):
+    """
+    Load a FAISS index saved with save_local; returns (vectorstore, mode).
+
+    With mmap the vectors are mapped read-only instead of copied onto the
+    heap, so every worker process serving the same index shares one set of
+    physical pages through the OS page cache. The docstore pickle is still
+    loaded per process. mode is "mmap" when the vectors really are mapped
+    and "copied" when they ended up on the heap.
+    """
+    import faiss
+    from langchain.vectorstores import FAISS
+
+    if not mmap:
+        return FAISS.load_local(index_path, embedding, allow_dangerous_deserialization=True), "copied"
+
+    # IO_FLAG_MMAP alone only maps IVF inverted lists; flat indexes (what
+    # langchain builds) are mapped only with IO_FLAG_MMAP_IFC, which older
+    # faiss releases lack and which they silently ignore rather than reject
+    flat_mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    if flat_mmap_flag is not None:
+        flags |= flat_mmap_flag
+    try:
+        index = faiss.read_index(os.path.join(index_path, "index.faiss"), flags)
+    except RuntimeError:
+        # Index type without mmap support in this faiss build
+        return FAISS.load_local(index_path, embedding, allow_dangerous_deserialization=True), "copied"
+
+    mode = "mmap"
+    if flat_mmap_flag is None and isinstance(faiss.downcast_index(index), faiss.IndexFlat):
+        mode = "copied"
+
+    with open(os.path.join(index_path, "index.pkl"), "rb") as pkl_file:
+        docstore, index_to_docstore_id = pickle.load(pkl_file)
+
+    return FAISS(embedding, index, docstore, index_to_docstore_id), mode
+
+class IndexStore:
+    """
+    Process-wide cache so each index is loaded once and shared by all sessions.
+
+    Versioned indexes are watched: when the CURRENT pointer moves, the new
+    version is loaded on the watcher thread and then swapped into every
+    attached chain with a single attribute assignment. A turn reads the
+    vectorstore once, at retrieval, so in-flight turns finish on the version
+    they started with and the next turn uses the new one.
+    """
+
+    def __init__(self, embedding_factory):
+        self.embedding_factory = embedding_factory
+        self._embedding = None
+        self._indexes = {}
+        self._chains = {}
+        self._load_modes = {}
+        self._lock = threading.Lock()
+        self._embedding_lock = threading.Lock()
+        self._watcher = None
+
+    def get_embedding(self):
+        """Embedding model shared by every index and query in the process"""
+        with self._embedding_lock:
+            if self._embedding is None:
+                self._embedding = self.embedding_factory()
+            return self._embedding
+
+    def _load(self, index_path):
+        index_dir, version = resolve_index_dir(index_path)
+        vectorstore, mode = load_faiss_index(index_dir, self.get_embedding())
+        self._load_modes[index_path] = mode
+        metrics.set_gauge("index_mmapped", 1 if mode == "mmap" else 0, index=index_path)
+        if INDEX_MMAP and mode != "mmap":
+            # Every process holds its own copy of the vectors
+            metrics.increment("index_mmap_unavailable", index=index_path)
+        return version, vectorstore
+
+    def get_with_version(self, index_path):
+        """(vectorstore, version) currently served for an index; version is None if unversioned"""
+        with self._lock:
+            if index_path not in self._indexes:
+                self._indexes[index_path] = self._load(index_path)
+                metrics.set_gauge("index_serving_version", version_number(self._indexes[index_path][0]), index=index_path)
+            version, vectorstore = self._indexes[index_path]
+            return vectorstore, version
+
+    def get(self, index_path):
+        return self.get_with_version(index_path)[0]
+
+    def attach(self, chain):
+        """Keep a chain's vectorstore in step with the version being served"""
+        with self._lock:
+            self._chains.setdefault(chain.index_path, weakref.WeakSet()).add(chain)
+
+    def loaded_paths(self):
+        with self._lock:
+            return list(self._indexes)
+
+    def load_modes(self):
+        """How each loaded index holds its vectors, "mmap" or "copied" by index path"""
+        return dict(self._load_modes)
+
+    def serving_versions(self):
+        with self._lock:
+            return {path: version for path, (version, _) in self._indexes.items()}
+
+    def refresh(self, index_path):
+        """Load and switch to the pointer's version if it moved; returns True on a switch"""
+        with self._lock:
+            served = self._indexes.get(index_path, (None, None))[0]
+        _, version = resolve_index_dir(index_path)
+        if version is None or version == served:
+            return False
+
+        # Loading happens outside the lock so turns keep using the old version meanwhile
+        version, vectorstore = self._load(index_path)
+        with self._lock:
+            self._indexes[index_path] = (version, vectorstore)
+            chains = list(self._chains.get(index_path, ()))
+        for chain in chains:
+            chain.swap_index(vectorstore, version)
+        metrics.set_gauge("index_serving_version", version_number(version), index=index_path)
+
+        metrics.increment("index_swaps", index=index_path)
+        return True
+
+    def start_watcher(self, poll_seconds=None):
+        """Poll loaded indexes for pointer changes on a background thread (once)"""
+        poll_seconds = poll_seconds or INDEX_VERSION_CONFIG["poll_seconds"]
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(
+                    target=self._watch_forever, args=(poll_seconds,), name="index-watcher", daemon=True
+                )
+                self._watcher.start()
+        return self
+
+    def _watch_forever(self, poll_seconds):
+        while True:
+            time.sleep(poll_seconds)
+            for index_path in self.loaded_paths():
+                try:
+                    self.refresh(index_path)
+                except Exception:
+                    # Keep serving the loaded version; the next poll retries
+                    metrics.increment("index_swap_errors", index=index_path)
@@ -0,0 +1,114 @@
+"""
+Versioned index directories with a manifest and an atomic "current" pointer
+
+    mental_health_index/
+        CURRENT                 # name of the version being served, e.g. "v0003"
+        versions/
+            v0002/  index.faiss  index.pkl  manifest.json
+            v0003/  index.faiss  index.pkl  manifest.json
+
+The pointer is replaced with os.replace, so readers see either the old or
+the new version, never a half-written one. A directory without a CURRENT
+file is treated as a plain (unversioned) index, as built before versioning.
+"""
+
+import json
+import os
+import shutil
+import time
+from config.settings import INDEX_VERSION_CONFIG
+
+def _versions_root(index_path):
+    return os.path.join(index_path, INDEX_VERSION_CONFIG["versions_dir"])
+
+def version_number(version):
+    """Numeric part of a version name ("v0003" -> 3); 0 for unversioned indexes"""
+    try:
+        return int(version.lstrip("v"))
+    except (AttributeError, ValueError):
+        return 0
+
+def list_versions(index_path):
+    """Complete versions (those with a manifest), oldest first"""
+    root = _versions_root(index_path)
+    if not os.path.isdir(root):
+        return []
+    versions = [
+        name for name in os.listdir(root)
+        if os.path.isfile(os.path.join(root, name, INDEX_VERSION_CONFIG["manifest_file"]))
+    ]
+    return sorted(versions, key=version_number)
+
+def current_version(index_path):
+    """Version named by the pointer file, or None for an unversioned index"""
+    try:
+        with open(os.path.join(index_path, INDEX_VERSION_CONFIG["pointer_file"])) as pointer:
+            return pointer.read().strip() or None
+    except OSError:
+        return None
+
+def resolve_index_dir(index_path):
+    """(directory holding index.faiss, version) for the version currently served"""
+    version = current_version(index_path)
+    if version is None:
+        return index_path, None
+    return os.path.join(_versions_root(index_path), version), version
+
+def read_manifest(index_path, version):
+    with open(os.path.join(_versions_root(index_path), version, INDEX_VERSION_CONFIG["manifest_file"])) as manifest:
+        return json.load(manifest)
+
+def new_version_dir(index_path):
+    """Create and return (directory, version) for the next version to build"""
+    existing = [version_number(name) for name in os.listdir(_versions_root(index_path))] \
+        if os.path.isdir(_versions_root(index_path)) else []
+    version = f"v{max(existing, default=0) + 1:04d}"
+    version_dir = os.path.join(_versions_root(index_path), version)
+    os.makedirs(version_dir)
+    return version_dir, version
+
+def write_manifest(index_path, version, **details):
+    """Record how a version was built; a version only counts as complete once this exists"""
+    manifest = dict(details, version=version, created_at=time.time(), previous=current_version(index_path))
+    path = os.path.join(_versions_root(index_path), version, INDEX_VERSION_CONFIG["manifest_file"])
+    with open(path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+def set_current(index_path, version):
+    """Atomically point the index at a complete version"""
+    if version not in list_versions(index_path):
+        raise ValueError(f"No complete version '{version}' in {index_path}")
+    pointer = os.path.join(index_path, INDEX_VERSION_CONFIG["pointer_file"])
+    temp_pointer = f"{pointer}.tmp"
+    with open(temp_pointer, "w") as pointer_file:
+        pointer_file.write(version)
+        pointer_file.flush()
+        os.fsync(pointer_file.fileno())
+    os.replace(temp_pointer, pointer)
+
+def rollback(index_path, version=None):
+    """Serve an earlier version: the given one, or the one served before the current"""
+    current = current_version(index_path)
+    if version is None:
+        if current is None:
+            raise ValueError(f"{index_path} is not versioned; nothing to roll back to")
+        version = read_manifest(index_path, current).get("previous")
+        if version is None:
+            older = [name for name in list_versions(index_path) if version_number(name) < version_number(current)]
+            if not older:
+                raise ValueError(f"No version older than {current} in {index_path}")
+            version = older[-1]
+    set_current(index_path, version)
+    return version
+
+def prune_versions(index_path, keep=None):
+    """Delete the oldest versions beyond keep, never the one being served"""
+    keep = keep or INDEX_VERSION_CONFIG["keep_versions"]
+    current = current_version(index_path)
+    removed = []
+    for version in list_versions(index_path)[:-keep]:
+        if version != current:
+            shutil.rmtree(os.path.join(_versions_root(index_path), version), ignore_errors=True)
+            removed.append(version)
+    return removed
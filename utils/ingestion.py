@@ -0,0 +1,74 @@
+"""
+PDF ingestion and FAISS index building
+"""
+
+import shutil
+from langchain.document_loaders import PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.embeddings import OpenAIEmbeddings
+from langchain.vectorstores import FAISS
+from config.settings import OPENAI_API_KEY, INGESTION_CONFIG, QA_CHAIN_CONFIG, DEDUP_CONFIG
+from utils.dedup import dedup_chunks
+from utils.index_versions import new_version_dir, write_manifest, set_current, prune_versions
+from utils.text_processing import count_tokens
+
+def load_pdf_chunks(pdf_path=None, chunk_size=None, chunk_overlap=None, dedup=None):
+    """
+    Split a PDF into chunk documents that carry their page and token count.
+
+    Returns (chunks, dedup stats); stats is None when dedup is disabled.
+    """
+    pdf_path = pdf_path or INGESTION_CONFIG["pdf_path"]
+    if dedup is None:
+        dedup = DEDUP_CONFIG["enabled"]
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size or INGESTION_CONFIG["chunk_size"],
+        chunk_overlap=chunk_overlap or INGESTION_CONFIG["chunk_overlap"]
+    )
+
+    pages = PyPDFLoader(pdf_path).load()
+    chunks = splitter.split_documents(pages)
+
+    dedup_stats = None
+    if dedup:
+        chunks, dedup_stats = dedup_chunks(chunks)
+
+    for index, chunk in enumerate(chunks):
+        chunk.metadata["chunk_id"] = index
+        chunk.metadata["token_count"] = count_tokens(chunk.page_content)
+
+    return chunks, dedup_stats
+
+def build_index(pdf_path=None, output_path=None):
+    """
+    Build a chunk-level FAISS index as a new version and make it current.
+
+    Returns the version's manifest (version, chunk count, dedup stats). Running apps switch to the new version
+    on their next index poll; older versions beyond keep_versions are pruned.
+    """
+    output_path = output_path or QA_CHAIN_CONFIG["vector_store_path"]
+    pdf_path = pdf_path or INGESTION_CONFIG["pdf_path"]
+    chunks, dedup_stats = load_pdf_chunks(pdf_path)
+
+    embedding = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+    vectorstore = FAISS.from_documents(chunks, embedding)
+
+    version_dir, version = new_version_dir(output_path)
+    try:
+        vectorstore.save_local(version_dir)
+        manifest = write_manifest(
+            output_path, version,
+            source=pdf_path,
+            chunk_count=len(chunks),
+            chunk_size=INGESTION_CONFIG["chunk_size"],
+            chunk_overlap=INGESTION_CONFIG["chunk_overlap"],
+            embedding_model=embedding.model,
+            dedup=dedup_stats
+        )
+    except Exception:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+
+    set_current(output_path, version)
+    prune_versions(output_path)
+    return manifest
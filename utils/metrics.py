@@ -0,0 +1,80 @@
+"""
+In-process metrics: counters, gauges and latency samples
+"""
+
+import threading
+from collections import deque
+
+def _metric_key(name, labels):
+    if not labels:
+        return name
+    label_text = ",".join(f"{key}={value}" for key, value in sorted(labels.items()))
+    return f"{name}{{{label_text}}}"
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers (None when empty)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[rank]
+
+class MetricsRegistry:
+    """Thread-safe metric store shared by every session in the process"""
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._counters = {}
+        self._gauges = {}
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        """Record a sample (e.g. a latency in seconds); the most recent max_samples are kept"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.max_samples)
+            self._samples[key].append(value)
+
+    def quantile(self, name, fraction, **labels):
+        key = _metric_key(name, labels)
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        return percentile(samples, fraction)
+
+    def sample_count(self, name, **labels):
+        key = _metric_key(name, labels)
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def snapshot(self):
+        """Plain-dict view of every metric, with p50/p95/p99 for samples"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            samples = {key: list(values) for key, values in self._samples.items()}
+
+        summaries = {}
+        for key, values in samples.items():
+            summaries[key] = {
+                "count": len(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99)
+            }
+
+        return {"counters": counters, "gauges": gauges, "latencies": summaries}
+
+# Process-wide registry
+metrics = MetricsRegistry()
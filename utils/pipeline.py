@@ -0,0 +1,78 @@
+"""
+Minimal asyncio engine for pipelines of stages with declared dependencies
+"""
+
+import asyncio
+import time
+from utils.metrics import metrics
+
+class Stage:
+    """
+    One pipeline step.
+
+    func receives the shared context dict; its return value is stored in the
+    context under the stage name. Coroutine functions are awaited, plain
+    functions run on a worker thread so they never block the event loop.
+    """
+
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+class StagedPipeline:
+    """Run stages as soon as their dependencies finish, overlapping independent ones"""
+
+    def __init__(self, name, stages, executor=None):
+        self.name = name
+        self.stages = list(stages)
+        self.executor = executor
+        self._validate()
+
+    def _validate(self):
+        seen = set()
+        for stage in self.stages:
+            missing = [dep for dep in stage.depends_on if dep not in seen]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on undeclared or later stages: {missing}")
+            if stage.name in seen:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            seen.add(stage.name)
+
+    async def _run_stage(self, stage, context, tasks, timings):
+        if stage.depends_on:
+            await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+
+        start = time.perf_counter()
+        if asyncio.iscoroutinefunction(stage.func):
+            result = await stage.func(context)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, stage.func, context)
+
+        seconds = time.perf_counter() - start
+        timings[stage.name] = round(seconds, 4)
+        metrics.observe("stage_seconds", seconds, pipeline=self.name, stage=stage.name)
+
+        context[stage.name] = result
+        return result
+
+    async def run_async(self, context):
+        """Run every stage; returns (context, per-stage seconds)"""
+        timings = {}
+        tasks = {}
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.ensure_future(self._run_stage(stage, context, tasks, timings))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return context, timings
+
+    def run(self, context):
+        """Synchronous entry point for callers without a running event loop"""
+        return asyncio.run(self.run_async(context))
@@ -2,34 +2,18 @@
 QA Chain initialization and management
 """
 
-import streamlit as st
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
-from langchain.llms import OpenAI
-from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
-from config.settings import OPENAI_API_KEY, QA_CHAIN_CONFIG
-
-@st.cache_resource
-def initialize_qa_chain():
-    """Initialize the QA chain with caching"""
-    try:
-        embedding_model = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-        
-        vectorstore = FAISS.load_local(
-            QA_CHAIN_CONFIG["vector_store_path"],
-            embedding_model,
-            allow_dangerous_deserialization=True
-        )
+import threading
+from config.settings import OPENAI_API_KEY, QA_CHAIN_CONFIG, INDEX_VERSION_CONFIG
+from utils.answer_cache import history_fingerprint
+from utils.index_store import IndexStore, available_index_paths
+from utils.retrieval import retrieve_context, batch_retrieve_context
+from utils.resilience import CircuitOpenError, get_breaker, resilient_call
 
-        custom_prompt = PromptTemplate(
-            input_variables=["context", "question", "chat_history"],
-            template="""
+CUSTOM_PROMPT_TEMPLATE = """
         You are a friendly, casual mental health supporter. Talk like a caring friend - warm but not overly clinical.
 
         Keep responses:
-        - Short and natural (1-3 sentences usually)  
+        - Short and natural (1-3 sentences usually)
         - Conversational, not formal
         - Focus on the person, not lengthy advice
         - Ask follow-up questions to keep dialogue flowing
@@ -40,38 +24,169 @@ def initialize_qa_chain():
 
         Respond naturally and briefly:
         """
+
+def create_embeddings():
+    """Embedding model used for both indexing and queries"""
+    from langchain.embeddings import OpenAIEmbeddings
+    return OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+
+# Indexes are loaded once per process and shared by every session's chain
+index_store = IndexStore(create_embeddings)
+
+def format_chat_history(chat_history, max_turns=None):
+    """Render the last few exchanges of a session's chat history for the prompt"""
+    if not chat_history:
+        return ""
+    max_turns = max_turns or QA_CHAIN_CONFIG["history_turns"]
+    recent = chat_history[-max_turns * 2:]
+    speakers = {"user": "User", "bot": "Supporter"}
+    return "\n".join(f"{speakers.get(role, role)}: {message}" for role, message in recent)
+
+class SupportQAChain:
+    """
+    Retrieval-augmented answering with each stage callable on its own.
+
+    Keeping retrieval and generation separate lets a turn shrink retrieval,
+    time out generation and still fall back to the retrieved chunks.
+    """
+
+    def __init__(self, vectorstore, embedding, llm, prompt, index_path, index_version=None):
+        self.vectorstore = vectorstore
+        self.embedding = embedding
+        self.llm = llm
+        self.prompt = prompt
+        self.index_path = index_path
+        self.index_version = index_version
+
+    @property
+    def cache_scope(self):
+        """Answer cache scope; a new index version starts with an empty scope"""
+        if self.index_version is None:
+            return self.index_path
+        return f"{self.index_path}@{self.index_version}"
+
+    def answer_scope(self, chat_history=None):
+        """Answer cache scope for a turn: the index version plus the history in its prompt"""
+        return (self.cache_scope, history_fingerprint(format_chat_history(chat_history)))
+
+    def swap_index(self, vectorstore, version):
+        """Serve a new index version from the next retrieval on"""
+        self.vectorstore = vectorstore
+        self.index_version = version
+
+    def embed_query(self, question):
+        return self.embedding.embed_query(question)
+
+    def embed_queries(self, questions):
+        """Embed many questions in one provider call"""
+        return self.embedding.embed_documents(list(questions))
+
+    def retrieve_batch(self, query_embeddings, k=None):
+        """retrieve() for many embedded questions with a single FAISS search"""
+        k = k or QA_CHAIN_CONFIG["search_kwargs"]["k"]
+        return batch_retrieve_context(self.vectorstore, query_embeddings, k)
+
+    def retrieve(self, question, k=None, query_embedding=None):
+        """Token-budgeted context chunks for a question"""
+        if query_embedding is None:
+            query_embedding = self.embed_query(question)
+        k = k or QA_CHAIN_CONFIG["search_kwargs"]["k"]
+        return retrieve_context(self.vectorstore, query_embedding, k)
+
+    def build_prompt(self, question, docs, chat_history=None):
+        return self.prompt.format(
+            context="\n\n".join(doc.page_content for doc in docs),
+            chat_history=format_chat_history(chat_history),
+            question=question
         )
-        
-        llm = OpenAI(
-            temperature=QA_CHAIN_CONFIG["temperature"], 
-            openai_api_key=OPENAI_API_KEY
-        )
-        
-        memory = ConversationBufferMemory(
-            memory_key="chat_history", 
-            return_messages=True, 
-            output_key="answer"
-        )
-        
-        return ConversationalRetrievalChain.from_llm(
-            llm=llm,
-            retriever=vectorstore.as_retriever(search_kwargs=QA_CHAIN_CONFIG["search_kwargs"]),
-            memory=memory,
-            return_source_documents=True,
-            combine_docs_chain_kwargs={"prompt": custom_prompt}
-        )
-    
-    except Exception as e:
-        st.error(f"Failed to initialize QA chain: {e}")
-        return None
-
-def get_qa_response(qa_chain, question):
-    """Get response from QA chain with error handling"""
-    try:
-        if qa_chain is None:
-            return {"answer": "I'm sorry, but I'm having trouble accessing my knowledge base right now."}
-        
-        response = qa_chain.invoke({"question": question})
-        return response
-    except Exception as e:
-        return {"answer": f"I encountered an error while processing your question: {e}"}
\ No newline at end of file
+
+    def generate(self, question, docs, chat_history=None):
+        """Ask the LLM for an answer grounded in the given chunks"""
+        # Hedged and circuit-broken: a degraded provider fails fast
+        return resilient_call("llm", self.llm.invoke, self.build_prompt(question, docs, chat_history))
+
+    def generate_stream(self, question, docs, chat_history=None):
+        """Yield the answer in pieces as the LLM produces them (circuit-broken, not hedged)"""
+        breaker = get_breaker("llm")
+        if not breaker.allow():
+            raise CircuitOpenError("llm is temporarily unavailable")
+
+        received = False
+        try:
+            for chunk in self.llm.stream(self.build_prompt(question, docs, chat_history)):
+                received = True
+                yield chunk
+        except GeneratorExit:
+            # Abandoned by a turn that ran out of time. Record an outcome either
+            # way so a half-open trial is released: the LLM counts as working
+            # if it had started answering
+            if received:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+
+    def invoke(self, inputs):
+        """Retrieve and generate in one call: {"question", "chat_history"} -> {"answer", "source_documents"}"""
+        question = inputs["question"]
+        docs = self.retrieve(question)
+        answer = self.generate(question, docs, inputs.get("chat_history"))
+        return {"answer": answer, "source_documents": docs}
+
+def build_qa_chain(index_path=None):
+    """Build the QA chain, importing langchain only when it is first needed"""
+    from langchain.llms import OpenAI
+    from langchain.prompts import PromptTemplate
+
+    index_path = index_path or QA_CHAIN_CONFIG["vector_store_path"]
+
+    custom_prompt = PromptTemplate(
+        input_variables=["context", "question", "chat_history"],
+        template=CUSTOM_PROMPT_TEMPLATE
+    )
+
+    llm = OpenAI(
+        temperature=QA_CHAIN_CONFIG["temperature"],
+        openai_api_key=OPENAI_API_KEY
+    )
+
+    vectorstore, index_version = index_store.get_with_version(index_path)
+    chain = SupportQAChain(
+        vectorstore=vectorstore,
+        embedding=index_store.get_embedding(),
+        llm=llm,
+        prompt=custom_prompt,
+        index_path=index_path,
+        index_version=index_version
+    )
+    index_store.attach(chain)
+    return chain
+
+_chain_warmup = None
+_chain_warmup_lock = threading.Lock()
+
+def get_chain_warmup():
+    """
+    Process-wide QA chain warm-up, started in the background on first use.
+
+    A module-level singleton rather than st.cache_resource so serve.py can
+    start it before Streamlit's runtime exists. The first call also starts
+    the index watcher and the /ready health endpoint, and raises OSError if
+    the health port is taken.
+    """
+    global _chain_warmup
+    with _chain_warmup_lock:
+        if _chain_warmup is None:
+            from utils.warmup import ChainWarmup
+            from utils.health import start_health_server
+            warmup = ChainWarmup(build_qa_chain, available_index_paths())
+            # Bind the health port first so a taken port fails before any work starts
+            start_health_server(warmup)
+            if INDEX_VERSION_CONFIG["watch"]:
+                index_store.start_watcher()
+            _chain_warmup = warmup.start()
+        return _chain_warmup
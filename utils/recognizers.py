@@ -0,0 +1,135 @@
+"""
+Pluggable speech recognizer backends
+
+Every backend takes a speech_recognition AudioData and returns the
+transcript, or None when nothing intelligible was heard.
+
+Benchmark backends against recorded WAV files with:
+    python -m utils.recognizers --backend faster_whisper sample1.wav sample2.wav
+"""
+
+import threading
+import time
+from config.settings import VOICE_CONFIG
+
+class SpeechRecognizerBackend:
+    """Base class for speech-to-text backends"""
+
+    name = "base"
+
+    def transcribe(self, audio):
+        """Return the transcript for an AudioData, or None"""
+        raise NotImplementedError
+
+class GoogleRecognizer(SpeechRecognizerBackend):
+    """Google Web Speech API (network round trip, no local model)"""
+
+    name = "google"
+
+    def __init__(self, language="en-US"):
+        self.language = language
+
+    def transcribe(self, audio):
+        import speech_recognition as sr
+
+        try:
+            return sr.Recognizer().recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            return None
+
+class FasterWhisperRecognizer(SpeechRecognizerBackend):
+    """Offline Whisper transcription with faster-whisper (pip install faster-whisper)"""
+
+    name = "faster_whisper"
+
+    def __init__(self, model_size=None, device="cpu", compute_type="int8"):
+        self.model_size = model_size or VOICE_CONFIG["whisper_model"]
+        self.device = device
+        self.compute_type = compute_type
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+                self._model = WhisperModel(
+                    self.model_size, device=self.device, compute_type=self.compute_type
+                )
+        return self._model
+
+    def transcribe(self, audio):
+        import numpy as np
+
+        raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+        segments, _ = self._get_model().transcribe(samples, language="en", beam_size=1)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        return text or None
+
+RECOGNIZER_BACKENDS = {
+    GoogleRecognizer.name: GoogleRecognizer,
+    FasterWhisperRecognizer.name: FasterWhisperRecognizer
+}
+
+_recognizers = {}
+_recognizers_lock = threading.Lock()
+
+def get_recognizer(name=None):
+    """Shared recognizer instance for a backend name (models load once per process)"""
+    name = name or VOICE_CONFIG["recognizer"]
+    if name not in RECOGNIZER_BACKENDS:
+        raise ValueError(f"Unknown recognizer backend: {name}")
+
+    with _recognizers_lock:
+        if name not in _recognizers:
+            _recognizers[name] = RECOGNIZER_BACKENDS[name]()
+        return _recognizers[name]
+
+def audio_duration(audio):
+    """Length of an AudioData clip in seconds"""
+    return len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+
+def benchmark_recognizer(recognizer, wav_paths, repeats=1):
+    """Time a backend on WAV files; returns one result dict per file"""
+    import speech_recognition as sr
+
+    results = []
+    for path in wav_paths:
+        with sr.AudioFile(path) as source:
+            audio = sr.Recognizer().record(source)
+
+        timings = []
+        text = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            text = recognizer.transcribe(audio)
+            timings.append(time.perf_counter() - start)
+
+        duration = audio_duration(audio)
+        best = min(timings)
+        results.append({
+            "path": path,
+            "text": text,
+            "audio_seconds": round(duration, 3),
+            "best_seconds": round(best, 3),
+            "mean_seconds": round(sum(timings) / len(timings), 3),
+            "real_time_factor": round(best / duration, 3) if duration else None
+        })
+
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark speech recognizer backends")
+    parser.add_argument("wav_paths", nargs="+", help="WAV files to transcribe")
+    parser.add_argument("--backend", default=VOICE_CONFIG["recognizer"], choices=sorted(RECOGNIZER_BACKENDS))
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per file (best time is reported)")
+    args = parser.parse_args()
+
+    backend = get_recognizer(args.backend)
+    for result in benchmark_recognizer(backend, args.wav_paths, args.repeats):
+        print(json.dumps(result))
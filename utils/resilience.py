@@ -0,0 +1,168 @@
+"""
+Hedged requests and circuit breakers for slow or failing backends
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config.settings import RESILIENCE_CONFIG
+from utils.metrics import metrics
+
+# Kept apart from the turn worker pool so hedges never wait behind the turn that sent them
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="backend-call")
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit is open"""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After failure_threshold failures in a row the circuit opens and calls
+    fail fast for reset_seconds; then a single trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit. A trial that
+    has not reported back within reset_seconds counts as a failure, so a
+    hung call cannot hold the circuit half-open.
+    """
+
+    def __init__(self, backend, failure_threshold=None, reset_seconds=None):
+        self.backend = backend
+        self.failure_threshold = failure_threshold or RESILIENCE_CONFIG["breaker_failure_threshold"]
+        self.reset_seconds = reset_seconds or RESILIENCE_CONFIG["breaker_reset_seconds"]
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._trial_started = None
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge("circuit_state", _STATE_VALUES[self.state], backend=self.backend)
+
+    def allow(self):
+        """Whether a call may go to the backend now"""
+        with self._lock:
+            now = time.time()
+            if (self.state == HALF_OPEN and self._trial_in_flight
+                    and now - self._trial_started >= self.reset_seconds):
+                # The trial hung: re-open and try again after another reset period
+                metrics.increment("circuit_trial_expired", backend=self.backend)
+                self.state = OPEN
+                self.opened_at = now
+                self._trial_in_flight = False
+                self._publish()
+
+            if self.state == OPEN and now - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+                self._publish()
+
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started = now
+                return True
+
+        metrics.increment("circuit_rejections", backend=self.backend)
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self._publish()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    metrics.increment("circuit_opened", backend=self.backend)
+                self.state = OPEN
+                self.opened_at = time.time()
+                self._publish()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(backend):
+    """Process-wide circuit breaker for a backend name"""
+    with _breakers_lock:
+        if backend not in _breakers:
+            _breakers[backend] = CircuitBreaker(backend)
+        return _breakers[backend]
+
+def hedge_delay(backend, config=None):
+    """Seconds to wait before hedging: the backend's recent p95 latency, clamped"""
+    config = config or RESILIENCE_CONFIG
+    if metrics.sample_count("backend_seconds", backend=backend) < config["hedge_min_samples"]:
+        return config["hedge_default_delay"]
+    p95 = metrics.quantile("backend_seconds", config["hedge_quantile"], backend=backend)
+    return min(config["hedge_max_delay"], max(config["hedge_min_delay"], p95))
+
+def _timed(func, args, kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def resilient_call(backend, func, *args, hedge=None, **kwargs):
+    """
+    Call a backend through its circuit breaker, hedging slow calls.
+
+    If the first request has not answered after hedge_delay(), an identical
+    second request is sent and whichever succeeds first is returned. The
+    slower request is left to finish in the background.
+    """
+    breaker = get_breaker(backend)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{backend} is temporarily unavailable")
+
+    if hedge is None:
+        hedge = backend in RESILIENCE_CONFIG["hedged_backends"]
+    # A half-open circuit gets exactly one trial request
+    if breaker.state != CLOSED:
+        hedge = False
+
+    futures = {_executor.submit(_timed, func, args, kwargs): "primary"}
+    pending = set(futures)
+    last_error = None
+
+    if hedge:
+        done, pending = wait(pending, timeout=hedge_delay(backend))
+        if not done:
+            hedge_future = _executor.submit(_timed, func, args, kwargs)
+            futures[hedge_future] = "hedge"
+            pending.add(hedge_future)
+            metrics.increment("hedges_sent", backend=backend)
+        else:
+            pending = done
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result, seconds = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+
+            breaker.record_success()
+            metrics.observe("backend_seconds", seconds, backend=backend)
+            if len(futures) > 1:
+                metrics.increment("hedge_wins", backend=backend, winner=futures[future])
+            return result
+
+    breaker.record_failure()
+    metrics.increment("backend_errors", backend=backend)
+    raise last_error
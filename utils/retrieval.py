@@ -0,0 +1,48 @@
+"""
+FAISS retrieval with token-budgeted context packing
+"""
+
+import math
+from config.settings import CONTEXT_CONFIG
+from utils.context_packing import pack_context
+
+def relevance_from_distance(distance):
+    """Convert a FAISS L2 score to a 0-1 relevance, as langchain's FAISS store does"""
+    return 1.0 - distance / math.sqrt(2)
+
+def search_by_vector(vectorstore, query_embedding, k):
+    """Top-k (document, relevance) pairs for an already embedded query"""
+    hits = vectorstore.similarity_search_with_score_by_vector(query_embedding, k=k)
+    return [(doc, relevance_from_distance(distance)) for doc, distance in hits]
+
+def retrieve_context(vectorstore, query_embedding, k, token_budget=None):
+    """Fetch k candidate chunks and keep the best ones that fit the token budget"""
+    return pack_context(
+        search_by_vector(vectorstore, query_embedding, k),
+        token_budget=token_budget or CONTEXT_CONFIG["token_budget"]
+    )
+
+def batch_search_by_vector(vectorstore, query_embeddings, k):
+    """Top-k (document, relevance) pairs for many queries with one FAISS search call"""
+    import numpy as np
+
+    vectors = np.asarray(query_embeddings, dtype=np.float32)
+    distances, indices = vectorstore.index.search(vectors, k)
+
+    results = []
+    for row_distances, row_indices in zip(distances, indices):
+        hits = []
+        for distance, index in zip(row_distances, row_indices):
+            if index == -1:
+                continue
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[index])
+            hits.append((doc, relevance_from_distance(float(distance))))
+        results.append(hits)
+    return results
+
+def batch_retrieve_context(vectorstore, query_embeddings, k, token_budget=None):
+    """retrieve_context for many already embedded queries at once"""
+    return [
+        pack_context(hits, token_budget=token_budget or CONTEXT_CONFIG["token_budget"])
+        for hits in batch_search_by_vector(vectorstore, query_embeddings, k)
+    ]
@@ -0,0 +1,276 @@
+"""
+Per-session memory accounting and reaping of idle sessions
+
+Every script run registers its session. A background reaper moves sessions
+idle for longer than idle_spill_seconds to disk (chat history only) and
+frees their heavy state; a returning visitor gets their history back on the
+next run. Spilled sessions are deleted after spill_ttl_seconds.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+import streamlit as st
+from config.settings import SESSION_CONFIG
+from utils.metrics import metrics
+
+# Session state keys that grow or hold large objects
+HEAVY_KEYS = [
+    "chat_history", "audio_generated", "pending_audio", "pending_audio_html",
+    "voice_handler", "last_browser_audio"
+]
+
+def estimate_size(obj, seen=None, depth=0, max_depth=6):
+    """Approximate deep size in bytes of containers, strings and plain objects"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or depth > max_depth:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, seen, depth + 1, max_depth)
+            size += estimate_size(value, seen, depth + 1, max_depth)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, seen, depth + 1, max_depth)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_size(vars(obj), seen, depth + 1, max_depth)
+    return size
+
+def process_rss_bytes():
+    """Current resident set size of this process, or None if unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+        except ImportError:
+            return None
+
+def session_state_target(state):
+    """
+    The object that lives as long as the session itself.
+
+    ctx.session_state is a SafeSessionState wrapper made for each script run
+    and released when the run ends. The SessionState it wraps belongs to
+    the AppSession and survives until Streamlit drops the session.
+    """
+    return getattr(state, "_state", state)
+
+def current_session():
+    """(session id, session state object) for the running script, or (None, None)"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None, None
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None, None
+    return ctx.session_id, ctx.session_state
+
+class SessionRecord:
+    def __init__(self, session_id, state):
+        self.session_id = session_id
+        # Weakref to the long-lived SessionState, not the per-run wrapper
+        self.state_ref = weakref.ref(session_state_target(state))
+        self.last_seen = time.time()
+        self.bytes = 0
+        self.spilled_at = None
+
+class SessionRegistry:
+    """Tracks sessions in this process, their memory use and idle time"""
+
+    def __init__(self, config=None):
+        self.config = config or SESSION_CONFIG
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        if self.config["use_tracemalloc"]:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def _spill_path(self, session_id):
+        return os.path.join(self.config["spill_dir"], f"{session_id}.json")
+
+    def touch(self, session_id, state):
+        """Register activity for a session, restoring it first if it was spilled"""
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None or record.state_ref() is not session_state_target(state):
+                record = SessionRecord(session_id, state)
+                self._sessions[session_id] = record
+            record.last_seen = time.time()
+
+        if record.spilled_at is not None or os.path.exists(self._spill_path(session_id)):
+            self._restore(record, state)
+
+        self._enforce_caps(record, state)
+        self.publish_metrics()
+
+    def measure(self, state):
+        return sum(
+            estimate_size(state[key]) for key in HEAVY_KEYS if key in state
+        )
+
+    def _enforce_caps(self, record, state):
+        """
+        Trim the oldest chat messages while the history is over its limits.
+
+        Only the history itself is compared with max_session_bytes, since it is
+        all this can trim (the voice handler and other state stay). The newest
+        min_chat_history messages are always kept.
+        """
+        if "chat_history" in state:
+            history = state["chat_history"]
+            limit = self.config["max_chat_history"]
+            keep = self.config["min_chat_history"]
+            while len(history) > keep and (len(history) > limit
+                                           or estimate_size(history) > self.config["max_session_bytes"]):
+                del history[:max(1, min(len(history) - limit, len(history) - keep))]
+                # Message indexes shifted, so treat everything left as already voiced
+                state["audio_generated"] = set(range(len(history)))
+                state["pending_audio"] = None
+                state["pending_audio_html"] = None
+                metrics.increment("session_history_trimmed")
+                limit = len(history)
+        record.bytes = self.measure(state)
+
+    def _spill(self, record, state):
+        """Write the session's chat history to disk and free its heavy state"""
+        os.makedirs(self.config["spill_dir"], exist_ok=True)
+        payload = {
+            "chat_history": list(state["chat_history"]) if "chat_history" in state else [],
+            "spilled_at": time.time()
+        }
+        with open(self._spill_path(record.session_id), "w") as spill_file:
+            json.dump(payload, spill_file)
+
+        for key in HEAVY_KEYS:
+            if key in state:
+                del state[key]
+        record.spilled_at = payload["spilled_at"]
+        record.bytes = 0
+        metrics.increment("sessions_spilled")
+
+    def _restore(self, record, state):
+        path = self._spill_path(record.session_id)
+        try:
+            with open(path) as spill_file:
+                payload = json.load(spill_file)
+            if "chat_history" not in state:
+                state["chat_history"] = [tuple(message) for message in payload["chat_history"]]
+            os.remove(path)
+            metrics.increment("sessions_restored")
+        except (OSError, ValueError, KeyError):
+            pass
+        record.spilled_at = None
+
+    def reap(self):
+        """Spill idle sessions, forget dead ones and delete expired spill files"""
+        now = time.time()
+        with self._lock:
+            records = list(self._sessions.values())
+
+        # Least recently used first, so the total cap evicts the idlest sessions
+        records.sort(key=lambda record: record.last_seen)
+        total = sum(record.bytes for record in records)
+
+        for record in records:
+            state = record.state_ref()
+            if state is None:
+                # Streamlit already dropped the session; nobody can come back for it
+                with self._lock:
+                    self._sessions.pop(record.session_id, None)
+                total -= record.bytes
+                try:
+                    os.remove(self._spill_path(record.session_id))
+                except OSError:
+                    pass
+                continue
+            if record.spilled_at is not None:
+                continue
+
+            idle = now - record.last_seen
+            over_total = total > self.config["max_total_bytes"]
+            # Over the total cap, sessions idle for a reaper interval are spilled too
+            if (idle >= self.config["idle_spill_seconds"]
+                    or (over_total and idle >= self.config["reap_interval_seconds"])):
+                total -= record.bytes
+                try:
+                    self._spill(record, state)
+                except Exception:
+                    metrics.increment("session_spill_errors")
+
+        self._delete_expired_spills(now)
+        self.publish_metrics()
+
+    def _delete_expired_spills(self, now):
+        spill_dir = self.config["spill_dir"]
+        if not os.path.isdir(spill_dir):
+            return
+        for name in os.listdir(spill_dir):
+            path = os.path.join(spill_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.config["spill_ttl_seconds"]:
+                    os.remove(path)
+                    metrics.increment("sessions_expired")
+            except OSError:
+                pass
+
+    def publish_metrics(self):
+        with self._lock:
+            records = list(self._sessions.values())
+        active = [record for record in records if record.spilled_at is None]
+        metrics.set_gauge("sessions_active", len(active))
+        metrics.set_gauge("sessions_spilled_current", len(records) - len(active))
+        metrics.set_gauge("session_bytes_total", sum(record.bytes for record in active))
+        metrics.set_gauge("session_bytes_max", max((record.bytes for record in active), default=0))
+
+        rss = process_rss_bytes()
+        if rss is not None:
+            metrics.set_gauge("process_rss_bytes", rss)
+        if self.config["use_tracemalloc"]:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            metrics.set_gauge("tracemalloc_current_bytes", current)
+            metrics.set_gauge("tracemalloc_peak_bytes", peak)
+
+    def start_reaper(self):
+        """Start the background reaper thread (once)"""
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_forever, name="session-reaper", daemon=True)
+                self._reaper.start()
+        return self
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(self.config["reap_interval_seconds"])
+            try:
+                self.reap()
+            except Exception:
+                metrics.increment("session_reaper_errors")
+
+@st.cache_resource
+def get_session_registry():
+    """Process-wide session registry with its reaper running"""
+    return SessionRegistry().start_reaper()
+
+def track_current_session():
+    """Record activity for the running session (call before initializing session state)"""
+    session_id, state = current_session()
+    if session_id is not None:
+        get_session_registry().touch(session_id, state)
@@ -4,14 +4,33 @@ Text processing utilities for the Mental Health Support app
 
 import random
 import re
-from config.settings import CASUAL_REPLACEMENTS, FOLLOW_UP_QUESTIONS, CRISIS_KEYWORDS
+from config.settings import (
+    CASUAL_REPLACEMENTS, FOLLOW_UP_QUESTIONS, CRISIS_KEYWORDS, INGESTION_CONFIG,
+    CRISIS_RESOURCES, REGIONAL_CRISIS_RESOURCES, DEFAULT_REGION
+)
+
+def apply_casual_replacements(text):
+    """Swap overly clinical phrases for casual ones"""
+    for formal, casual in CASUAL_REPLACEMENTS.items():
+        text = text.replace(formal, casual)
+    return text
+
+def casual_sentences_complete(text):
+    """
+    True once text holds every sentence make_response_casual can keep.
+
+    It keeps at most two substantial sentences out of the first three, so a
+    streamed answer can stop feeding TTS once this returns True.
+    """
+    finished = text.split('.')[:-1]
+    substantial = [sentence for sentence in finished[:3] if len(sentence.strip()) > 10]
+    return len(substantial) >= 2 or len(finished) >= 3
 
 def make_response_casual(response_text):
     """Make bot responses more casual and concise"""
     
     # Remove overly clinical language
-    for formal, casual in CASUAL_REPLACEMENTS.items():
-        response_text = response_text.replace(formal, casual)
+    response_text = apply_casual_replacements(response_text)
     
     # Split into sentences and keep only the most relevant ones
     sentences = response_text.split('.')
@@ -38,6 +57,10 @@ def detect_crisis_keywords(text):
     """Detect if text contains crisis-related keywords"""
     return any(word in text.lower() for word in CRISIS_KEYWORDS)
 
+def crisis_resources_for_region(region=None):
+    """Crisis hotlines to quote for a region (the default region if unset)"""
+    return REGIONAL_CRISIS_RESOURCES.get(region or DEFAULT_REGION, CRISIS_RESOURCES)
+
 def enhance_text_for_speech(text):
     """Enhanced text preprocessing for more natural speech"""
     # Remove markdown formatting
@@ -74,4 +97,49 @@ def clean_text_for_display(text):
     text = re.sub(r'\s+', ' ', text)
     # Ensure proper sentence spacing
     text = re.sub(r'\.([A-Z])', r'. \1', text)
-    return text.strip()
\ No newline at end of file
+    return text.strip()
+
+_token_encoder = None
+
+def count_tokens(text):
+    """Count prompt tokens in text, approximating when tiktoken is unavailable"""
+    global _token_encoder
+    if _token_encoder is None:
+        try:
+            import tiktoken
+            _token_encoder = tiktoken.get_encoding(INGESTION_CONFIG["tokenizer_encoding"])
+        except ImportError:
+            _token_encoder = False
+
+    if _token_encoder:
+        return len(_token_encoder.encode(text))
+
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+def split_complete_sentences(text, final=False):
+    """
+    Split text into finished sentences and the unfinished remainder.
+
+    While text is still streaming a sentence only counts as finished once
+    whitespace follows its punctuation; with final=True the tail is flushed.
+    """
+    parts = re.split(r'(?<=[.!?])\s+', text)
+    remainder = parts.pop()
+    if final:
+        parts.append(remainder)
+        remainder = ""
+    return [part.strip() for part in parts if part.strip()], remainder
+
+def extract_key_sentences(text, max_sentences=2, max_chars=300):
+    """Pull the first few complete sentences from a chunk for an extractive reply"""
+    text = re.sub(r'\s+', ' ', text).strip()
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if len(s.strip()) > 10]
+
+    summary = ""
+    for sentence in sentences[:max_sentences]:
+        if summary and len(summary) + len(sentence) + 1 > max_chars:
+            break
+        summary = f"{summary} {sentence}".strip()
+
+    return summary[:max_chars]
@@ -0,0 +1,370 @@
+"""
+Chat turn pipeline shared by the text, voice and batch entry points
+
+Stages and what each waits for:
+
+    crisis ──────────────┐
+    chain ──► embed ──┬─► crisis_semantic ─────────┐
+                      └─► retrieve ──► generate ───┴──► reply ──► speech
+
+Keyword crisis screening overlaps loading the chain and embedding the
+query; the semantic screen reuses the query embedding as soon as it
+exists, alongside retrieval. When speech is wanted each sentence goes to TTS while the LLM is still
+writing the next one. Every stage respects the turn deadline; if no chain
+is available in time the turn degrades to a canned reply (still with the
+crisis resources when the keyword screen fired).
+"""
+
+import asyncio
+import threading
+from config.settings import DEADLINE_CONFIG, AUDIT_LOG_CONFIG
+from utils.answer_cache import answer_cache
+from utils.audit_log import audit_log
+from utils.crisis_screen import crisis_screener
+from utils.deadline import (
+    TurnDeadline, PARTIAL, CACHE, turn_executor, choose_k, can_start_generation,
+    should_skip_tts, cache_late_answer, fallback_answer, record_turn_outcome
+)
+from utils.metrics import metrics
+from utils.pipeline import Stage, StagedPipeline
+from utils.text_processing import (
+    apply_casual_replacements, casual_sentences_complete, crisis_resources_for_region,
+    detect_crisis_keywords, make_response_casual, split_complete_sentences
+)
+
+CRISIS_PREFIX = "I can see you're going through something really difficult right now. You're not alone. 💙"
+
+def crisis_block(region=None):
+    """Opening of a crisis reply: the prefix and the region's crisis resources"""
+    return f"{CRISIS_PREFIX}\n\n{crisis_resources_for_region(region)}"
+
+def compose_reply(answer, is_crisis, region=None):
+    """Final reply text: casual answer, with the region's crisis resources first when needed"""
+    answer = make_response_casual(answer)
+    if is_crisis:
+        return f"{crisis_block(region)}\n\n{answer}"
+    return answer
+
+def speech_segments(text):
+    """Split a reply into the pieces synthesized separately (sentences; lists stay whole)"""
+    segments = []
+    for block in text.split("\n\n"):
+        block = block.strip()
+        if not block:
+            continue
+        if "\n" in block:
+            segments.append(block)
+        else:
+            segments.extend(split_complete_sentences(block, final=True)[0])
+    return segments
+
+def _speech_key(text):
+    return " ".join(text.split()).rstrip(".!?").lower()
+
+class SentenceSpeaker:
+    """Starts TTS for reply segments as soon as they are known and reuses the results"""
+
+    def __init__(self, voice_handler):
+        self.voice_handler = voice_handler
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def speak(self, text):
+        key = _speech_key(text)
+        if not key:
+            return None
+        with self._lock:
+            if key not in self._futures:
+                self._futures[key] = turn_executor.submit(self.voice_handler.synthesize_speech, text)
+            return self._futures[key]
+
+    async def assemble(self, segments, timeout):
+        """MP3 bytes for the segments in order, or None if any failed or ran late"""
+        futures = [future for future in map(self.speak, segments) if future is not None]
+        if not futures:
+            return None
+        try:
+            parts = await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(future) for future in futures)), timeout
+            )
+        except asyncio.TimeoutError:
+            return None
+        if any(part is None for part in parts):
+            return None
+        # Same-format MP3 segments play back-to-back when concatenated
+        return b"".join(parts)
+
+async def _in_worker(func, *args, timeout=None, **kwargs):
+    """Await func on the turn worker pool; returns (result, concurrent future), result None on timeout"""
+    future = turn_executor.submit(func, *args, **kwargs)
+    try:
+        result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+    except asyncio.TimeoutError:
+        return None, future
+    return result, future
+
+def _record_error(ctx, stage, error):
+    metrics.increment("turn_errors", stage=stage)
+    audit_log.log("error", session_id=ctx.get("session_id"), stage=stage, error=repr(error))
+
+def _screen_crisis(ctx):
+    is_crisis = detect_crisis_keywords(ctx["question"])
+    speaker = ctx.get("speaker")
+    if is_crisis and speaker is not None:
+        # The crisis block opens the reply, so its audio can start right away
+        for segment in speech_segments(crisis_block(ctx.get("region"))):
+            speaker.speak(segment)
+    return is_crisis
+
+async def _screen_crisis_semantic(ctx):
+    """Catch paraphrased crisis messages by comparing the query embedding with exemplars"""
+    if ctx["crisis"]:
+        return True
+    if not crisis_screener.is_crisis(ctx["embed"]):
+        return False
+    metrics.increment("crisis_semantic_detections")
+    speaker = ctx.get("speaker")
+    if speaker is not None:
+        for segment in speech_segments(crisis_block(ctx.get("region"))):
+            speaker.speak(segment)
+    return True
+
+def _load_chain(ctx):
+    """The QA chain, or None if it is not available within the turn deadline"""
+    chain = ctx["chain_provider"](ctx["deadline"].remaining())
+    if chain is None:
+        metrics.increment("turn_timeouts", stage="chain")
+    return chain
+
+async def _embed_query(ctx):
+    if ctx.get("query_embedding") is not None:
+        return ctx["query_embedding"]
+    if ctx["chain"] is None:
+        return None
+    deadline = ctx["deadline"]
+    budget = deadline.remaining() - DEADLINE_CONFIG["min_generation_seconds"]
+    try:
+        embedding, _ = await _in_worker(ctx["chain"].embed_query, ctx["question"], timeout=max(0.0, budget))
+    except Exception as e:
+        _record_error(ctx, "embed", e)
+        return None
+    if embedding is None:
+        metrics.increment("turn_timeouts", stage="embed")
+    return embedding
+
+async def _retrieve(ctx):
+    deadline = ctx["deadline"]
+    k, level = choose_k(deadline)
+    if ctx.get("documents") is not None:
+        return {"docs": ctx["documents"], "level": level}
+    docs = None
+    if ctx["chain"] is not None and ctx["embed"] is not None:
+        budget = deadline.remaining() - DEADLINE_CONFIG["min_generation_seconds"]
+        try:
+            docs, _ = await _in_worker(
+                ctx["chain"].retrieve, ctx["question"], k=k,
+                query_embedding=ctx["embed"], timeout=max(0.0, budget)
+            )
+        except Exception as e:
+            _record_error(ctx, "retrieve", e)
+        if docs is None:
+            metrics.increment("turn_timeouts", stage="retrieve")
+    return {"docs": docs or [], "level": level}
+
+async def _stream_answer(ctx, docs):
+    """Stream the LLM answer, handing each finished sentence to TTS; returns (text, partial)"""
+    chain, question, deadline = ctx["chain"], ctx["question"], ctx["deadline"]
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def publish(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+            return True
+        except RuntimeError:
+            # Event loop closed: the turn already finished without us
+            return False
+
+    def produce():
+        stream = chain.generate_stream(question, docs, ctx.get("chat_history"))
+        try:
+            for chunk in stream:
+                if not publish(("chunk", chunk)):
+                    return
+            publish(("done", None))
+        except Exception as e:
+            publish(("error", e))
+        finally:
+            # Closing lets the stream record its outcome with the circuit breaker
+            stream.close()
+
+    turn_executor.submit(produce)
+
+    text = pending = spoken = ""
+    while True:
+        try:
+            kind, value = await asyncio.wait_for(queue.get(), deadline.remaining())
+        except asyncio.TimeoutError:
+            metrics.increment("turn_timeouts", stage="generate")
+            finished, _ = split_complete_sentences(text)
+            return " ".join(finished) or None, True
+
+        if kind == "error":
+            _record_error(ctx, "generate", value)
+            return None, False
+        if kind == "done":
+            return text, False
+
+        text += value
+        sentences, pending = split_complete_sentences(pending + value)
+        for sentence in sentences:
+            casual = apply_casual_replacements(sentence)
+            # Sentences past what make_response_casual keeps would be synthesized for nothing
+            if casual_sentences_complete(spoken):
+                break
+            ctx["speaker"].speak(casual)
+            spoken += f" {casual}"
+
+async def _generate(ctx):
+    chain, question, deadline = ctx["chain"], ctx["question"], ctx["deadline"]
+    docs, level = ctx["retrieve"]["docs"], ctx["retrieve"]["level"]
+    answer = scope = None
+
+    if chain is not None:
+        # Cached answers are only shared between turns with the same prompt history
+        scope = chain.answer_scope(ctx.get("chat_history"))
+
+    if chain is not None and can_start_generation(deadline):
+        if ctx.get("speaker") is not None:
+            answer, partial = await _stream_answer(ctx, docs)
+            if answer and partial:
+                level = PARTIAL
+            elif answer:
+                answer_cache.put(question, answer, scope)
+        else:
+            try:
+                answer, future = await _in_worker(
+                    chain.generate, question, docs, ctx.get("chat_history"),
+                    timeout=deadline.remaining()
+                )
+                if answer is None:
+                    metrics.increment("turn_timeouts", stage="generate")
+                    cache_late_answer(future, question, scope)
+                else:
+                    answer_cache.put(question, answer, scope)
+            except Exception as e:
+                _record_error(ctx, "generate", e)
+                answer = None
+
+    if not answer:
+        answer, level = fallback_answer(question, docs, scope)
+
+    return {"answer": answer, "level": level}
+
+def _compose(ctx):
+    return compose_reply(ctx["generate"]["answer"], ctx["crisis_semantic"], ctx.get("region"))
+
+async def _speak(ctx):
+    deadline = ctx["deadline"]
+    skip_tts = should_skip_tts(deadline)
+    speaker = ctx.get("speaker")
+    if speaker is None or skip_tts:
+        return {"audio": None, "skip_tts": skip_tts}
+    audio = await speaker.assemble(speech_segments(ctx["reply"]), deadline.remaining())
+    return {"audio": audio, "skip_tts": False}
+
+def build_turn_pipeline():
+    return StagedPipeline("turn", [
+        Stage("crisis", _screen_crisis),
+        Stage("chain", _load_chain),
+        Stage("embed", _embed_query, depends_on=["chain"]),
+        Stage("crisis_semantic", _screen_crisis_semantic, depends_on=["crisis", "embed"]),
+        Stage("retrieve", _retrieve, depends_on=["chain", "embed"]),
+        Stage("generate", _generate, depends_on=["chain", "retrieve"]),
+        Stage("reply", _compose, depends_on=["crisis_semantic", "generate"]),
+        Stage("speech", _speak, depends_on=["reply"])
+    ], executor=turn_executor)
+
+turn_pipeline = build_turn_pipeline()
+
+def _audit_turn(result, context, session_id):
+    """Queue the audit events for a finished turn (never blocks)"""
+    include_text = AUDIT_LOG_CONFIG["include_text"]
+    audit_log.log(
+        "turn",
+        session_id=session_id,
+        question=result["question"] if include_text else None,
+        reply=result["reply"] if include_text else None,
+        is_crisis=result["is_crisis"],
+        degradation=result["degradation"],
+        index_version=getattr(context.get("chain"), "index_version", None),
+        sources=[doc.metadata.get("chunk_id") for doc in result["source_documents"]],
+        timings=result["timings"]
+    )
+    if result["is_crisis"]:
+        audit_log.log(
+            "crisis",
+            session_id=session_id,
+            method="keyword" if context["crisis"] else "semantic",
+            question=result["question"] if include_text else None
+        )
+    if result["degradation"] == CACHE:
+        audit_log.log("cache_hit", session_id=session_id, question=result["question"] if include_text else None)
+
+async def run_turn_async(question, chain_provider, chat_history=None, voice_handler=None,
+                         deadline=None, query_embedding=None, documents=None, session_id=None,
+                         region=None):
+    """
+    Run one chat turn through the pipeline.
+
+    chain_provider is called with the seconds left in the turn and returns
+    the QA chain to use, or None if none is available in that time.
+    Pass a voice_handler to also synthesize the reply, and query_embedding
+    or documents when they were already computed in bulk. session_id tags
+    the turn's audit log events; region picks the crisis resources quoted
+    (DEFAULT_REGION if None). Returns the reply
+    text plus the crisis flag, degradation level, audio bytes (or None),
+    source documents and per-stage timings.
+    """
+    deadline = deadline or TurnDeadline()
+    speaker = None
+    if voice_handler is not None and voice_handler.is_available():
+        speaker = SentenceSpeaker(voice_handler)
+
+    context, timings = await turn_pipeline.run_async({
+        "question": question,
+        "chain_provider": chain_provider,
+        "chat_history": chat_history,
+        "deadline": deadline,
+        "speaker": speaker,
+        "query_embedding": query_embedding,
+        "documents": documents,
+        "session_id": session_id,
+        "region": region
+    })
+
+    level = context["generate"]["level"]
+    skip_tts = context["speech"]["skip_tts"]
+    record_turn_outcome(level, skip_tts, deadline)
+
+    result = {
+        "question": question,
+        "reply": context["reply"],
+        "answer": context["generate"]["answer"],
+        "is_crisis": context["crisis_semantic"],
+        "degradation": level,
+        "skip_tts": skip_tts,
+        "audio": context["speech"]["audio"],
+        "source_documents": context["retrieve"]["docs"],
+        "timings": timings
+    }
+    _audit_turn(result, context, session_id)
+    return result
+
+def run_turn(question, chain_provider, chat_history=None, voice_handler=None, deadline=None,
+             session_id=None, region=None):
+    """Synchronous wrapper around run_turn_async (e.g. for Streamlit scripts)"""
+    return asyncio.run(run_turn_async(
+        question, chain_provider, chat_history, voice_handler, deadline,
+        session_id=session_id, region=region
+    ))
@@ -3,46 +3,197 @@ Voice processing handler for the Mental Health Support app
 """
 
 import streamlit as st
+import array
 import base64
+import collections
+import io
+import math
 import time
 from config.settings import VOICE_FEATURES_AVAILABLE, VOICE_CONFIG, OPENAI_API_KEY
 from utils.text_processing import enhance_text_for_speech
+from utils.recognizers import get_recognizer
+from utils.resilience import resilient_call
 
-if VOICE_FEATURES_AVAILABLE:
-    import speech_recognition as sr
-    from gtts import gTTS
-    import io
+def audio_html(audio_bytes, autoplay=True):
+    """Embed MP3 bytes in an HTML audio player"""
+    audio_base64 = base64.b64encode(audio_bytes).decode()
+    return f"""
+    <audio controls {"autoplay " if autoplay else ""}style="width: 100%; margin: 10px 0;">
+        <source src="data:audio/mpeg;base64,{audio_base64}" type="audio/mpeg">
+    </audio>
+    """
 
 class VoiceHandler:
     def __init__(self):
         self.available = VOICE_FEATURES_AVAILABLE
         self.config = VOICE_CONFIG
+        self._recognizer = None
+        self._calibrated_at = None
+        self._vad = None
+        self._openai_client = None
         
     def is_available(self):
         """Check if voice features are available"""
         return self.available
     
+    def _get_recognizer(self):
+        """Per-session speech_recognition Recognizer, kept so calibration is reused"""
+        if self._recognizer is None:
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+            self._recognizer.dynamic_energy_threshold = False
+        return self._recognizer
+
+    def _calibrate(self, recognizer, source):
+        """Sample ambient noise only on first use or once the calibration is stale"""
+        if (self._calibrated_at is not None
+                and time.time() - self._calibrated_at < self.config["calibration_ttl"]):
+            return
+        recognizer.adjust_for_ambient_noise(source, duration=self.config["calibration_duration"])
+        self._calibrated_at = time.time()
+
+    def _get_vad(self):
+        """webrtcvad detector when installed, otherwise None (energy threshold is used)"""
+        if self._vad is None:
+            try:
+                import webrtcvad
+                self._vad = webrtcvad.Vad(self.config["vad_aggressiveness"])
+            except ImportError:
+                self._vad = False
+        return self._vad or None
+
+    def _is_speech(self, frame, sample_rate, energy_threshold):
+        vad = self._get_vad()
+        if vad is not None:
+            return vad.is_speech(frame, sample_rate)
+        samples = array.array("h", frame)
+        if not samples:
+            return False
+        rms = math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+        return rms > energy_threshold
+
+    def _capture_utterance(self, recognizer, source):
+        """Record from the mic until speech ends, using voice activity detection"""
+        import speech_recognition as sr
+
+        frame_seconds = source.CHUNK / source.SAMPLE_RATE
+        end_silence = self.config["end_silence_ms"] / 1000
+        preroll = collections.deque(maxlen=max(1, int(0.3 / frame_seconds)))
+        frames = []
+        waited = speech_seconds = silence_seconds = 0.0
+
+        while True:
+            frame = source.stream.read(source.CHUNK)
+            is_speech = self._is_speech(frame, source.SAMPLE_RATE, recognizer.energy_threshold)
+
+            if not frames:
+                waited += frame_seconds
+                preroll.append(frame)
+                if is_speech:
+                    frames.extend(preroll)
+                elif waited > self.config["listen_timeout"]:
+                    return None
+                continue
+
+            frames.append(frame)
+            speech_seconds += frame_seconds
+            silence_seconds = 0.0 if is_speech else silence_seconds + frame_seconds
+            if silence_seconds >= end_silence or speech_seconds >= self.config["phrase_time_limit"]:
+                break
+
+        return sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
     def listen_for_speech(self):
-        """Simple speech recognition"""
+        """Record one utterance from the microphone and transcribe it"""
         if not self.available:
             return None
         
         try:
-            recognizer = sr.Recognizer()
-            with sr.Microphone() as source:
+            import speech_recognition as sr
+
+            recognizer = self._get_recognizer()
+            # 16 kHz mono with frames sized for webrtcvad
+            chunk_size = int(16000 * self.config["vad_frame_ms"] / 1000)
+            with sr.Microphone(sample_rate=16000, chunk_size=chunk_size) as source:
+                self._calibrate(recognizer, source)
                 st.info("🎤 Listening... speak now")
-                recognizer.adjust_for_ambient_noise(source, duration=1)
-                audio = recognizer.listen(
-                    source, 
-                    timeout=self.config["listen_timeout"], 
-                    phrase_time_limit=self.config["phrase_time_limit"]
-                )
+                audio = self._capture_utterance(recognizer, source)
             
+            if audio is None:
+                st.warning("I didn't hear anything. Please try again.")
+                return None
+
             st.info("Processing...")
-            return recognizer.recognize_google(audio)
+            text = get_recognizer(self.config["recognizer"]).transcribe(audio)
+            if not text:
+                st.warning("Could not understand audio. Please try again.")
+            return text
         except Exception as e:
             st.warning("Could not understand audio. Please try again.")
             return None
+
+    def transcribe_audio_bytes(self, wav_bytes):
+        """Transcribe audio recorded in the browser (WAV bytes)"""
+        if not self.available:
+            return None
+
+        try:
+            import speech_recognition as sr
+
+            with sr.AudioFile(io.BytesIO(wav_bytes)) as source:
+                audio = sr.Recognizer().record(source)
+            text = get_recognizer(self.config["recognizer"]).transcribe(audio)
+            if not text:
+                st.warning("Could not understand audio. Please try again.")
+            return text
+        except Exception:
+            st.warning("Could not understand audio. Please try again.")
+            return None
+    
+    def synthesize_gtts(self, text):
+        """Synthesize speech with gTTS, returning MP3 bytes"""
+        import re
+        from gtts import gTTS
+
+        clean_text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
+        clean_text = re.sub(r'[^\w\s.,!?;:\'-]', '', clean_text)
+        clean_text = re.sub(r'\n+', '. ', clean_text)
+        
+        def synthesize():
+            tts = gTTS(text=clean_text, lang='en', slow=False)
+            audio_buffer = io.BytesIO()
+            tts.write_to_fp(audio_buffer)
+            return audio_buffer.getvalue()
+        
+        return resilient_call("gtts", synthesize, hedge=False)
+    
+    def synthesize_openai(self, text):
+        """Synthesize speech with OpenAI TTS, returning MP3 bytes"""
+        enhanced_text = enhance_text_for_speech(text)
+        
+        # Hedged and circuit-broken; an open circuit fails fast
+        response = resilient_call(
+            "tts_openai",
+            self._get_openai_client().audio.speech.create,
+            model=self.config["tts_model"],
+            voice=self.config["voice"],
+            input=enhanced_text,
+            speed=self.config["speed"]
+        )
+        return response.content
+    
+    def synthesize_speech(self, text):
+        """MP3 bytes from OpenAI TTS, falling back to gTTS; None if both fail"""
+        if not self.available:
+            return None
+        
+        try:
+            return self.synthesize_openai(text)
+        except Exception:
+            try:
+                return self.synthesize_gtts(text)
+            except Exception:
+                return None
     
     def text_to_speech_gtts(self, text):
         """Convert text to speech using gTTS (fallback method)"""
@@ -50,51 +201,25 @@ class VoiceHandler:
             return None
         
         try:
-            import re
-            clean_text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-            clean_text = re.sub(r'[^\w\s.,!?;:\'-]', '', clean_text)
-            clean_text = re.sub(r'\n+', '. ', clean_text)
-            
-            tts = gTTS(text=clean_text, lang='en', slow=False)
-            audio_buffer = io.BytesIO()
-            tts.write_to_fp(audio_buffer)
-            audio_buffer.seek(0)
-            
-            audio_base64 = base64.b64encode(audio_buffer.getvalue()).decode()
-            return f"""
-            <audio controls style="width: 100%; margin: 10px 0;">
-                <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-            </audio>
-            """
+            return audio_html(self.synthesize_gtts(text), autoplay=False)
         except Exception:
             return None
     
     def text_to_speech_openai(self, text):
         """Convert text to speech using OpenAI TTS"""
         try:
-            from openai import OpenAI
-            
-            client = OpenAI(api_key=OPENAI_API_KEY)
-            enhanced_text = enhance_text_for_speech(text)
-            
-            response = client.audio.speech.create(
-                model=self.config["tts_model"],
-                voice=self.config["voice"],
-                input=enhanced_text,
-                speed=self.config["speed"]
-            )
-            
-            audio_base64 = base64.b64encode(response.content).decode()
-            
-            return f"""
-            <audio controls autoplay style="width: 100%; margin: 10px 0;">
-                <source src="data:audio/mpeg;base64,{audio_base64}" type="audio/mpeg">
-            </audio>
-            """
+            return audio_html(self.synthesize_openai(text))
         except Exception as e:
             # Fallback to gTTS if OpenAI fails
             return self.text_to_speech_gtts(text)
     
+    def _get_openai_client(self):
+        """OpenAI client kept per session so its connection pool is reused"""
+        if self._openai_client is None:
+            from openai import OpenAI
+            self._openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        return self._openai_client
+    
     def text_to_speech_with_progress(self, text):
         """
         Convert text to speech with progress indicator
@@ -0,0 +1,184 @@
+"""
+Background warm-up of the QA chain and knowledge base index
+"""
+
+import os
+import threading
+import time
+from config.settings import QA_CHAIN_CONFIG, WARMUP_CONFIG, CRISIS_SCREEN_CONFIG
+from utils.crisis_screen import crisis_screener
+from utils.index_versions import resolve_index_dir
+
+def touch_index_files(index_path, block_size=1024 * 1024):
+    """Read every file in the index directory so its pages sit in the OS cache"""
+    bytes_read = 0
+    index_path, _ = resolve_index_dir(index_path)
+    if not os.path.isdir(index_path):
+        return bytes_read
+
+    for name in sorted(os.listdir(index_path)):
+        file_path = os.path.join(index_path, name)
+        if not os.path.isfile(file_path):
+            continue
+        with open(file_path, "rb") as index_file:
+            while True:
+                block = index_file.read(block_size)
+                if not block:
+                    break
+                bytes_read += len(block)
+
+    return bytes_read
+
+class ChainWarmup:
+    """Build the QA chain on a background thread and report readiness"""
+
+    def __init__(self, build_func, index_paths=None, config=None):
+        self.build_func = build_func
+        self.index_paths = index_paths or [QA_CHAIN_CONFIG["vector_store_path"]]
+        self.config = config or WARMUP_CONFIG
+        self.chains = {}
+        self.error = None
+        self.steps = {}
+        self.started_at = None
+        self.finished_at = None
+        self._ready = threading.Event()
+        self._chain_built = threading.Event()
+        self._start_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._failed_paths = set()
+        self._building = set()
+        self._thread = None
+
+    @property
+    def chain(self):
+        """Chain for the default (first) index"""
+        return self.chains.get(self.index_paths[0])
+
+    def start(self):
+        """Start warming up in the background (safe to call more than once)"""
+        with self._start_lock:
+            if self._thread is None:
+                self.started_at = time.time()
+                self._thread = threading.Thread(target=self._run, name="qa-chain-warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def _timed_step(self, name, func):
+        step_start = time.perf_counter()
+        result = func()
+        self.steps[name] = round(time.perf_counter() - step_start, 3)
+        return result
+
+    def _run(self):
+        try:
+            for index_path in self.index_paths:
+                try:
+                    self.chains[index_path] = self._timed_step(
+                        f"build_chain:{index_path}", lambda: self.build_func(index_path)
+                    )
+                except Exception:
+                    # Only the default index is required for the app to be ready
+                    if index_path == self.index_paths[0]:
+                        raise
+                    self.steps[f"build_chain:{index_path}"] = None
+                    self._failed_paths.add(index_path)
+                    continue
+
+                if self.config["touch_index"]:
+                    self._timed_step(f"touch_index:{index_path}", lambda: touch_index_files(index_path))
+                # Turns can start on the default chain while the rest warms up
+                self._chain_built.set()
+
+            # Warm-up requests are best effort; a failure here is not fatal
+            if self.config["warm_embeddings"]:
+                try:
+                    self._timed_step("warm_embeddings", lambda: self.chain.embed_query("hello"))
+                except Exception:
+                    self.steps["warm_embeddings"] = None
+
+            if CRISIS_SCREEN_CONFIG["enabled"]:
+                try:
+                    self._timed_step("crisis_exemplars", lambda: crisis_screener.prepare(self.chain.embedding))
+                except Exception:
+                    # Keyword screening still runs; the semantic screen stays off
+                    self.steps["crisis_exemplars"] = None
+
+            if self.config["warm_llm"]:
+                try:
+                    self._timed_step("warm_llm", lambda: self.chain.llm.invoke("Hi", max_tokens=1))
+                except Exception:
+                    self.steps["warm_llm"] = None
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.time()
+            self._chain_built.set()
+            self._ready.set()
+
+    def is_ready(self):
+        """True once warm-up finished and the chain is usable"""
+        return self._ready.is_set() and self.chain is not None
+
+    def _build_in_background(self, index_path):
+        """Build a chain for an index that was not part of warm-up (once)"""
+        with self._build_lock:
+            if index_path in self.chains or index_path in self._failed_paths or index_path in self._building:
+                return
+            self._building.add(index_path)
+
+        def build():
+            try:
+                self.chains[index_path] = self._timed_step(
+                    f"build_chain:{index_path}", lambda: self.build_func(index_path)
+                )
+            except Exception:
+                self.steps[f"build_chain:{index_path}"] = None
+                self._failed_paths.add(index_path)
+            finally:
+                self._building.discard(index_path)
+
+        threading.Thread(target=build, name="qa-chain-build", daemon=True).start()
+
+    def wait_for_chain(self, index_path=None, timeout=None):
+        """
+        Wait up to timeout for the default chain to be built and return the chain
+        for an index, or None if no chain is available in time.
+
+        Only building the default chain is waited for, not the remaining warm-up
+        steps. An index that is not built yet falls back to the default chain;
+        one that was not part of warm-up is built in the background for later turns.
+        """
+        self.start()
+        if timeout is None:
+            timeout = self.config["wait_timeout"]
+        if not self._chain_built.wait(max(0.0, timeout)):
+            return None
+
+        index_path = index_path or self.index_paths[0]
+        if index_path not in self.chains and index_path not in self.index_paths:
+            self._build_in_background(index_path)
+        return self.chains.get(index_path, self.chain)
+
+    def readiness(self):
+        """Readiness probe payload"""
+        if self.is_ready():
+            status = "ready"
+        elif self._ready.is_set():
+            status = "failed"
+        elif self._thread is None:
+            status = "not_started"
+        else:
+            status = "warming"
+
+        duration = None
+        if self.started_at is not None and self.finished_at is not None:
+            duration = round(self.finished_at - self.started_at, 3)
+
+        return {
+            "status": status,
+            "ready": status == "ready",
+            "error": str(self.error) if self.error else None,
+            "indexes": {path: chain.index_version for path, chain in list(self.chains.items())},
+            "steps": dict(self.steps),
+            "warmup_seconds": duration
+        }